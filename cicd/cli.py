@@ -1,13 +1,10 @@
 """CLI interface for CI/CD trigger management"""
 
+import asyncio
 import typer
 from rich.console import Console
 from rich.table import Table
-from pathlib import Path
-import sys
-
-# Add parent directory to path to import config
-sys.path.insert(0, str(Path(__file__).parent.parent))
+from typing import List
 
 from deploy.config import Config
 from .trigger_manager import TriggerManager
@@ -25,22 +22,33 @@ def load_config() -> Config:
         raise typer.Exit(1)
 
 
+def get_manager(ctx: typer.Context) -> TriggerManager:
+    """
+    The invocation's TriggerManager, built on first use.
+
+    Loading config only when a command needs it keeps --help and shell
+    completion working without a config file.
+    """
+    if ctx.obj is None:
+        config = load_config()
+        ctx.obj = TriggerManager(config.project_id, config.region)
+    return ctx.obj
+
+
 @app.command()
-def setup():
+def setup(ctx: typer.Context):
     """Set up all CI/CD triggers"""
-    config = load_config()
-    manager = TriggerManager(config.project_id, config.region)
+    manager = get_manager(ctx)
 
-    manager.setup_all_triggers()
+    asyncio.run(manager.setup_all_triggers())
 
 
 @app.command()
-def list():
+def list(ctx: typer.Context):
     """List all build triggers"""
-    config = load_config()
-    manager = TriggerManager(config.project_id, config.region)
+    manager = get_manager(ctx)
 
-    triggers = manager.list_triggers()
+    triggers = asyncio.run(manager.list_triggers())
 
     if not triggers:
         return
@@ -57,23 +65,21 @@ def list():
 
 
 @app.command()
-def create_base_images():
+def create_base_images(ctx: typer.Context):
     """Create triggers for base image builds"""
-    config = load_config()
-    manager = TriggerManager(config.project_id, config.region)
+    manager = get_manager(ctx)
 
-    trigger_ids = manager.create_base_image_triggers()
+    trigger_ids = asyncio.run(manager.create_base_image_triggers())
 
     console.print(f'\n[green]Created {len(trigger_ids)} triggers[/green]')
 
 
 @app.command()
-def create_service(service_name: str):
+def create_service(ctx: typer.Context, service_name: str):
     """Create trigger for a specific service"""
-    config = load_config()
-    manager = TriggerManager(config.project_id, config.region)
+    manager = get_manager(ctx)
 
-    trigger_id = manager.create_service_trigger(service_name)
+    trigger_id = asyncio.run(manager.create_service_trigger(service_name))
 
     console.print(f'\n[green]✓ Created trigger for {service_name}[/green]')
     console.print(f'[dim]  Trigger ID: {trigger_id}[/dim]')
@@ -81,41 +87,78 @@ def create_service(service_name: str):
 
 @app.command()
 def run(
+    ctx: typer.Context,
     trigger_id: str = typer.Argument(..., help='Trigger ID to run'),
     branch: str = typer.Option('main', help='Git branch to build')
 ):
     """Manually run a trigger"""
-    config = load_config()
-    manager = TriggerManager(config.project_id, config.region)
+    manager = get_manager(ctx)
 
-    build_id = manager.run_trigger(trigger_id, branch)
+    build_id = asyncio.run(manager.run_trigger(trigger_id, branch))
 
     console.print(f'\n[green]✓ Build started: {build_id}[/green]')
 
 
 @app.command()
-def delete(trigger_id: str = typer.Argument(..., help='Trigger ID to delete')):
+def delete(
+    ctx: typer.Context,
+    trigger_id: str = typer.Argument(..., help='Trigger ID to delete'),
+    yes: bool = typer.Option(False, '--yes', '-y', help='Skip confirmation')
+):
     """Delete a build trigger"""
-    config = load_config()
-    manager = TriggerManager(config.project_id, config.region)
+    manager = get_manager(ctx)
 
     # Confirm deletion
-    confirm = typer.confirm(f"Delete trigger {trigger_id}?")
-    if not confirm:
+    if not yes and not typer.confirm(f"Delete trigger {trigger_id}?"):
         console.print('[yellow]Cancelled[/yellow]')
         return
 
-    manager.delete_trigger(trigger_id)
+    asyncio.run(manager.delete_trigger(trigger_id))
+
+
+@app.command()
+def delete_many(
+    ctx: typer.Context,
+    trigger_ids: List[str] = typer.Argument(..., help='Trigger IDs to delete'),
+    yes: bool = typer.Option(False, '--yes', '-y', help='Skip confirmation')
+):
+    """Delete several build triggers concurrently"""
+    manager = get_manager(ctx)
+
+    # Confirm deletion
+    if not yes and not typer.confirm(f"Delete {len(trigger_ids)} triggers?"):
+        console.print('[yellow]Cancelled[/yellow]')
+        return
+
+    async def _delete_all():
+        return await asyncio.gather(
+            *[manager.delete_trigger(t) for t in trigger_ids],
+            return_exceptions=True
+        )
+
+    # One failure shouldn't hide which of the other deletes went through
+    results = asyncio.run(_delete_all())
+    failed = 0
+    for trigger_id, result in zip(trigger_ids, results):
+        if isinstance(result, BaseException):
+            failed += 1
+            console.print(f'[red]✗ {trigger_id}: {result}[/red]')
+        else:
+            console.print(f'[green]✓ {trigger_id}[/green]')
+
+    if failed:
+        console.print(f'\n[red]{failed} of {len(trigger_ids)} deletes failed[/red]')
+        raise typer.Exit(1)
 
 
 @app.command()
-def info():
+def info(ctx: typer.Context):
     """Show CI/CD configuration"""
-    config = load_config()
+    manager = get_manager(ctx)
 
     console.print('\n[bold]CI/CD Configuration[/bold]\n')
-    console.print(f'[cyan]Project ID:[/cyan] {config.project_id}')
-    console.print(f'[cyan]Region:[/cyan] {config.region}')
+    console.print(f'[cyan]Project ID:[/cyan] {manager.project_id}')
+    console.print(f'[cyan]Region:[/cyan] {manager.region}')
     console.print()
 
 
@@ -1,5 +1,6 @@
 """Cloud Build Trigger Manager using Google Cloud APIs"""
 
+import asyncio
 from google.cloud.devtools import cloudbuild_v1
 from google.cloud.devtools.cloudbuild_v1.types import (
     BuildTrigger,
@@ -8,7 +9,7 @@ from google.cloud.devtools.cloudbuild_v1.types import (
     Build,
     BuildStep
 )
-from google.api_core import exceptions
+from google.api_core import exceptions, retry_async
 from rich.console import Console
 from typing import List, Dict, Optional
 from pathlib import Path
@@ -16,6 +17,22 @@ from pydantic import BaseModel
 
 console = Console()
 
+# List/Get/Delete are idempotent: retry transient failures with backoff
+IDEMPOTENT_RETRY = retry_async.AsyncRetry(
+    initial=0.1,
+    maximum=60.0,
+    multiplier=1.3,
+    deadline=600.0,
+    predicate=retry_async.if_exception_type(
+        exceptions.DeadlineExceeded,
+        exceptions.ServiceUnavailable
+    )
+)
+IDEMPOTENT_TIMEOUT = 60.0
+
+# Create/Update/Run are not idempotent: no retries, fail fast
+NON_IDEMPOTENT_TIMEOUT = 30.0
+
 
 class BuildConfig(BaseModel):
     """Configuration for a build trigger"""
@@ -36,13 +53,25 @@ class TriggerManager:
     - Auto-deploy on specific branches
     """
 
-    def __init__(self, project_id: str, region: str):
+    def __init__(self, project_id: str, region: str,
+                 client: Optional[cloudbuild_v1.CloudBuildAsyncClient] = None):
         self.project_id = project_id
         self.region = region
-        self.client = cloudbuild_v1.CloudBuildClient()
+        self._client = client
         self.parent = f"projects/{project_id}/locations/{region}"
-
-    def create_trigger(self, config: BuildConfig) -> str:
+        # Triggers by name, filled by a single ListBuildTriggers call on first lookup
+        self._trigger_index: Optional[Dict[str, BuildTrigger]] = None
+        self._index_lock = asyncio.Lock()
+
+    @property
+    def client(self) -> cloudbuild_v1.CloudBuildAsyncClient:
+        # Created on first use: the gRPC channel binds to the running event
+        # loop, and the CLI builds the manager before asyncio.run starts one
+        if self._client is None:
+            self._client = cloudbuild_v1.CloudBuildAsyncClient()
+        return self._client
+
+    async def create_trigger(self, config: BuildConfig) -> str:
         """
         Create a Cloud Build trigger.
 
@@ -54,11 +83,10 @@ class TriggerManager:
         """
         console.print(f'[cyan]Creating trigger: {config.name}...[/cyan]')
 
-        # Check if trigger already exists
-        existing = self._get_trigger_by_name(config.name)
-        if existing:
+        # Only consult the index if it's already loaded; otherwise just try to create
+        if self._trigger_index is not None and config.name in self._trigger_index:
             console.print(f'[yellow]Trigger {config.name} already exists, updating...[/yellow]')
-            return self._update_trigger(existing.id, config)
+            return await self._update_trigger(self._trigger_index[config.name].id, config)
 
         # Create trigger configuration
         trigger = BuildTrigger(
@@ -72,31 +100,45 @@ class TriggerManager:
         )
 
         try:
-            created_trigger = self.client.create_build_trigger(
+            created_trigger = await self.client.create_build_trigger(
                 project_id=self.project_id,
-                trigger=trigger
+                trigger=trigger,
+                retry=None,
+                timeout=NON_IDEMPOTENT_TIMEOUT
             )
 
             console.print(f'[green]Created trigger: {config.name}[/green]')
             console.print(f'[dim]  ID: {created_trigger.id}[/dim]')
 
+            if self._trigger_index is not None:
+                self._trigger_index[created_trigger.name] = created_trigger
+
             return created_trigger.id
 
+        except exceptions.AlreadyExists:
+            console.print(f'[yellow]Trigger {config.name} already exists, updating...[/yellow]')
+            # Index (if any) didn't know about it, so it's stale; reload once
+            self._trigger_index = None
+            existing = await self._get_trigger_by_name(config.name)
+            if not existing:
+                raise
+            return await self._update_trigger(existing.id, config)
+
         except Exception as e:
             console.print(f'[red]Failed to create trigger: {e}[/red]')
             raise
 
-    def create_base_image_triggers(self) -> List[str]:
+    async def create_base_image_triggers(self) -> List[str]:
         """
         Create triggers for base image builds.
 
+        The three triggers are independent, so they are created concurrently.
+
         Returns:
             List of trigger IDs
         """
         console.print('\n[bold]Setting up base image build triggers[/bold]\n')
 
-        triggers = []
-
         # Python base image trigger
         python_config = BuildConfig(
             name='build-python-base-image',
@@ -111,7 +153,6 @@ class TriggerManager:
                 '_IMAGE_NAME': 'python-playground'
             }
         )
-        triggers.append(self.create_trigger(python_config))
 
         # Node.js base image trigger
         nodejs_config = BuildConfig(
@@ -127,7 +168,6 @@ class TriggerManager:
                 '_IMAGE_NAME': 'nodejs-playground'
             }
         )
-        triggers.append(self.create_trigger(nodejs_config))
 
         # Go base image trigger
         go_config = BuildConfig(
@@ -143,12 +183,17 @@ class TriggerManager:
                 '_IMAGE_NAME': 'go-playground'
             }
         )
-        triggers.append(self.create_trigger(go_config))
+
+        triggers = await asyncio.gather(
+            self.create_trigger(python_config),
+            self.create_trigger(nodejs_config),
+            self.create_trigger(go_config)
+        )
 
         console.print(f'\n[green]Created {len(triggers)} base image triggers[/green]')
-        return triggers
+        return list(triggers)
 
-    def create_service_trigger(self, service_name: str) -> str:
+    async def create_service_trigger(self, service_name: str) -> str:
         """
         Create trigger for a specific service.
 
@@ -171,9 +216,9 @@ class TriggerManager:
             }
         )
 
-        return self.create_trigger(config)
+        return await self.create_trigger(config)
 
-    def list_triggers(self) -> List[BuildTrigger]:
+    async def list_triggers(self) -> List[BuildTrigger]:
         """
         List all build triggers.
 
@@ -183,18 +228,27 @@ class TriggerManager:
         console.print(f'\n[bold]Build Triggers in {self.project_id}[/bold]\n')
 
         try:
-            triggers = list(self.client.list_build_triggers(project_id=self.project_id))
-
-            if not triggers:
-                console.print('[yellow]No triggers found[/yellow]')
-                return []
+            pager = await self.client.list_build_triggers(
+                project_id=self.project_id,
+                retry=IDEMPOTENT_RETRY,
+                timeout=IDEMPOTENT_TIMEOUT
+            )
+            triggers = []
 
-            for trigger in triggers:
+            # Print each trigger as its page arrives instead of draining the pager first
+            async for trigger in pager:
                 console.print(f'[cyan]{trigger.name}[/cyan]')
                 console.print(f'  ID: {trigger.id}')
                 console.print(f'  Description: {trigger.description}')
                 console.print(f'  File: {trigger.filename}')
                 console.print()
+                triggers.append(trigger)
+
+            if not triggers:
+                console.print('[yellow]No triggers found[/yellow]')
+                return []
+
+            self._trigger_index = {trigger.name: trigger for trigger in triggers}
 
             return triggers
 
@@ -202,7 +256,7 @@ class TriggerManager:
             console.print(f'[red]Error listing triggers: {e}[/red]')
             return []
 
-    def delete_trigger(self, trigger_id: str):
+    async def delete_trigger(self, trigger_id: str):
         """
         Delete a build trigger.
 
@@ -212,16 +266,22 @@ class TriggerManager:
         trigger_name = f"{self.parent}/triggers/{trigger_id}"
 
         try:
-            self.client.delete_build_trigger(name=trigger_name)
+            await self.client.delete_build_trigger(
+                name=trigger_name,
+                retry=IDEMPOTENT_RETRY,
+                timeout=IDEMPOTENT_TIMEOUT
+            )
             console.print(f'[green]Deleted trigger: {trigger_id}[/green]')
+            self._forget_trigger(trigger_id)
 
         except exceptions.NotFound:
             console.print(f'[yellow]Trigger not found: {trigger_id}[/yellow]')
+            self._forget_trigger(trigger_id)
         except Exception as e:
             console.print(f'[red]Error deleting trigger: {e}[/red]')
             raise
 
-    def run_trigger(self, trigger_id: str, branch: str = 'main') -> str:
+    async def run_trigger(self, trigger_id: str, branch: str = 'main') -> str:
         """
         Manually run a trigger.
 
@@ -243,9 +303,11 @@ class TriggerManager:
                 branch_name=branch
             )
 
-            operation = self.client.run_build_trigger(
+            operation = await self.client.run_build_trigger(
                 name=trigger_name,
-                source=repo_source
+                source=repo_source,
+                retry=None,
+                timeout=NON_IDEMPOTENT_TIMEOUT
             )
 
             build = operation.metadata.build
@@ -258,18 +320,34 @@ class TriggerManager:
             console.print(f'[red]Error running trigger: {e}[/red]')
             raise
 
-    def _get_trigger_by_name(self, name: str) -> Optional[BuildTrigger]:
+    async def _ensure_index(self):
+        """List triggers once and cache them by name for subsequent lookups"""
+        async with self._index_lock:
+            if self._trigger_index is None:
+                pager = await self.client.list_build_triggers(
+                    project_id=self.project_id,
+                    retry=IDEMPOTENT_RETRY,
+                    timeout=IDEMPOTENT_TIMEOUT
+                )
+                self._trigger_index = {trigger.name: trigger async for trigger in pager}
+
+    def _forget_trigger(self, trigger_id: str):
+        """Drop a trigger from the cached index by ID"""
+        if self._trigger_index is None:
+            return
+        for name, trigger in list(self._trigger_index.items()):
+            if trigger.id == trigger_id:
+                del self._trigger_index[name]
+
+    async def _get_trigger_by_name(self, name: str) -> Optional[BuildTrigger]:
         """Get trigger by name"""
         try:
-            triggers = list(self.client.list_build_triggers(project_id=self.project_id))
-            for trigger in triggers:
-                if trigger.name == name:
-                    return trigger
-            return None
+            await self._ensure_index()
+            return self._trigger_index.get(name)
         except:
             return None
 
-    def _update_trigger(self, trigger_id: str, config: BuildConfig) -> str:
+    async def _update_trigger(self, trigger_id: str, config: BuildConfig) -> str:
         """Update existing trigger"""
         trigger_name = f"{self.parent}/triggers/{trigger_id}"
 
@@ -283,22 +361,27 @@ class TriggerManager:
         )
 
         try:
-            updated = self.client.update_build_trigger(
-                build_trigger=trigger
+            updated = await self.client.update_build_trigger(
+                build_trigger=trigger,
+                retry=None,
+                timeout=NON_IDEMPOTENT_TIMEOUT
             )
             console.print(f'[green]Updated trigger: {config.name}[/green]')
+
+            if self._trigger_index is not None:
+                self._trigger_index[updated.name] = updated
             return updated.id
 
         except Exception as e:
             console.print(f'[red]Error updating trigger: {e}[/red]')
             raise
 
-    def setup_all_triggers(self):
+    async def setup_all_triggers(self):
         """Set up all CI/CD triggers"""
         console.print('\n[bold]Setting up CI/CD triggers[/bold]\n')
 
         # Create base image triggers
-        self.create_base_image_triggers()
+        await self.create_base_image_triggers()
 
         console.print('\n[green]CI/CD setup complete![/green]')
         console.print('\n[dim]Triggers are manual-run only.[/dim]')
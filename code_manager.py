@@ -9,24 +9,30 @@ from typing import Annotated,Union,List
 openai_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 openai_model = "gpt-5"
 
+SYSTEM_MESSAGE = {
+    "role": "system",
+    "content": """you are an action chooser"""
+}
 
 
-async def do_prompt(conv)->List:
-    """Run the calculator tool example"""
+class ServiceChanges(BaseModel):
+    service_name: str
+    required_update:str
+
 
-    class ServiceChanges(BaseModel):
-        service_name: str
-        required_update:str
+class UpdateService(BaseModel):
+    updated_services: List[ServiceChanges]
 
-    class UpdateService(BaseModel):
-        updated_services: List[ServiceChanges]
 
+async def do_prompt(conv)->List:
+    """
+    Run the calculator tool example.
+
+    Returns the messages to append to `conv`: the model's structured reply
+    as a single assistant message.
+    """
 
-    messages = [
-        {
-            "role": "system",
-            "content": """you are an action chooser"""
-        },] + conv
+    messages = [SYSTEM_MESSAGE] + conv
 
     response = await openai_client.beta.chat.completions.parse(
         model=openai_model,
@@ -34,7 +40,7 @@ async def do_prompt(conv)->List:
         response_format=UpdateService
     )
 
-    return []
+    return [{"role": "assistant", "content": response.choices[0].message.content}]
 
 if __name__ == "__main__":
     # Run the example
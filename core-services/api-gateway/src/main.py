@@ -6,15 +6,26 @@ Routes requests to microservices and injects run_id for tracing.
 
 import os
 from fastapi import FastAPI, Request, Response
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 import sys
 from pathlib import Path
 
 # Simple implementations replacing playground_sdk
-import logging
+try:
+    import picologging as logging
+except ImportError:
+    import logging
+    # Skip record fields we never format
+    logging.logThreads = False
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
 from contextvars import ContextVar
-import uuid
+from dataclasses import dataclass, field
+from typing import ClassVar, Optional
+import secrets
+import orjson
 
 def setup_logging(service_name: str, level: str = 'INFO'):
     """Simple logging setup"""
@@ -26,18 +37,20 @@ def setup_logging(service_name: str, level: str = 'INFO'):
             '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
         ))
         logger.addHandler(handler)
+    logger.propagate = False
     return logger
 
 def setup_tracing(service_name: str):
     """Simple tracer setup (no-op for now)"""
     return None
 
+@dataclass(slots=True)
 class RunContext:
     """Simple run context for tracking request IDs"""
-    _current: ContextVar['RunContext'] = ContextVar('run_context', default=None)
+    _current: ClassVar[ContextVar[Optional['RunContext']]] = ContextVar('run_context', default=None)
 
-    def __init__(self, run_id: str = None):
-        self.run_id = run_id or str(uuid.uuid4())
+    # 32 hex chars; token_hex skips UUID version/variant handling and dashes
+    run_id: str = field(default_factory=lambda: secrets.token_hex(16))
 
     @classmethod
     def set_current(cls, context: 'RunContext'):
@@ -73,6 +86,7 @@ async def lifespan(app: FastAPI):
     yield
 
     logger.info("API Gateway shutting down...")
+    await app.state.registry.aclose()
 
 
 # Create FastAPI app
@@ -80,7 +94,8 @@ app = FastAPI(
     title="GCP Microservices Playground API Gateway",
     description="GraphQL Federation Gateway with Service Discovery",
     version="0.1.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # CORS middleware
@@ -101,29 +116,21 @@ async def inject_run_id(request: Request, call_next):
     If X-Run-ID header exists, use it.
     Otherwise, generate new run_id.
     """
-    run_id = request.headers.get('X-Run-ID')
+    run_id = request.headers.get('X-Run-ID') or secrets.token_hex(16)
 
-    if not run_id:
-        # Generate new run_id
-        run_ctx = RunContext()
-        run_id = run_ctx.run_id
-    else:
-        # Use existing run_id
-        run_ctx = RunContext(run_id=run_id)
+    # Set in context (reset via token once the request is done)
+    token = RunContext._current.set(RunContext(run_id))
 
-    # Set in context
-    RunContext.set_current(run_ctx)
+    try:
+        # Call next middleware/endpoint
+        response = await call_next(request)
 
-    # Add run_id to request state
-    request.state.run_id = run_id
+        # Add run_id to response headers
+        response.headers['X-Run-ID'] = run_id
 
-    # Call next middleware/endpoint
-    response = await call_next(request)
-
-    # Add run_id to response headers
-    response.headers['X-Run-ID'] = run_id
-
-    return response
+        return response
+    finally:
+        RunContext._current.reset(token)
 
 
 @app.get("/")
@@ -170,19 +177,22 @@ async def graphql_endpoint(request: Request):
     Later, implement GraphQL Federation for automatic schema composition.
     """
     registry: ServiceRegistry = request.app.state.registry
-    run_id = request.state.run_id
+    run_id = RunContext.get_current().run_id
 
-    body = await request.json()
+    body = orjson.loads(await request.body())
     query = body.get('query', '')
     variables = body.get('variables', {})
 
     # Simple routing based on query content
-    # TODO: Implement proper GraphQL Federation
+    # TODO: Implement proper GraphQL Federation. Once target services are
+    # resolved from the query, fan out with
+    # `await registry.call_services_parallel(targets, query, variables, run_id)`
+    # so latency is the slowest service rather than the sum of all of them.
 
     # For now, return info about available services
     return {
         "data": {
-            "services": list(registry.services.keys()),
+            "services": registry.service_names,
             "run_id": run_id,
             "message": "GraphQL Federation coming soon. Use /services endpoint to see available services."
         }
@@ -197,7 +207,7 @@ async def call_service(service_name: str, request: Request):
     Useful for testing and direct service calls.
     """
     registry: ServiceRegistry = request.app.state.registry
-    run_id = request.state.run_id
+    run_id = RunContext.get_current().run_id
 
     # Get service URL
     service_url = registry.get_service_url(service_name)
@@ -205,11 +215,11 @@ async def call_service(service_name: str, request: Request):
     if not service_url:
         return {
             "error": f"Service {service_name} not found",
-            "available_services": list(registry.services.keys())
+            "available_services": registry.service_names
         }, 404
 
     # Forward request to service
-    body = await request.json()
+    body = orjson.loads(await request.body())
 
     result = await registry.call_service(
         service_name=service_name,
@@ -5,12 +5,32 @@ Uses Cloud Run API to discover running services and their URLs.
 """
 
 import os
-from typing import Dict, Optional
+import time
+import asyncio
+from typing import Dict, List, Optional, Any, Tuple
 import httpx
+import orjson
 from google.cloud import run_v2
 from google.api_core import exceptions
 
 
+# Common service env vars, mapped to service names once at import
+# e.g., DB_SERVICE_URL -> db
+_ENV_TO_SERVICE: Dict[str, str] = {
+    env_var: env_var.replace('_SERVICE_URL', '').lower().replace('_', '-')
+    for env_var in (
+        'DB_SERVICE_URL',
+        'STORAGE_SERVICE_URL',
+        'UI_AUTOMATION_SERVICE_URL',
+        'QUERY_SERVICE_URL',
+        'PAYMENT_SERVICE_URL',
+        'ORDER_SERVICE_URL',
+        'EMAIL_SERVICE_URL',
+        'AUTH_SERVICE_URL',
+    )
+}
+
+
 class ServiceRegistry:
     """
     Discover and track available microservices.
@@ -19,11 +39,25 @@ class ServiceRegistry:
     Caches service URLs for fast lookup.
     """
 
-    def __init__(self, project_id: str, region: str):
+    def __init__(self, project_id: str, region: str, health_ttl: float = 5.0):
         self.project_id = project_id
         self.region = region
         self.services: Dict[str, str] = {}
-        self.client = run_v2.ServicesClient()
+        # Immutable copy of the service names, rebuilt whenever services change
+        self._services_snapshot: Tuple[str, ...] = ()
+        # Service URLs with the /graphql endpoint already appended
+        self._graphql_urls: Dict[str, str] = {}
+        # Recent health check results: {service_name: (checked_at, healthy)}
+        self._health_cache: Dict[str, Tuple[float, bool]] = {}
+        self._health_ttl = health_ttl
+        self.client = run_v2.ServicesAsyncClient()
+        # Shared HTTP client so calls to services reuse pooled (HTTP/2) connections
+        self.http = httpx.AsyncClient(
+            http2=True,
+            timeout=httpx.Timeout(30.0, connect=5.0),
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+            headers={'User-Agent': 'api-gateway/0.1.0'}
+        )
 
     async def discover_services(self):
         """
@@ -31,44 +65,56 @@ class ServiceRegistry:
 
         Populates self.services with {service_name: service_url}
         """
-        # First, check environment variables for local development
-        self._load_from_env()
+        # Read environment variables (local development) and Cloud Run concurrently
+        env_services, cloud_services = await asyncio.gather(
+            asyncio.to_thread(self._load_from_env),
+            self._discover_from_cloud_run(),
+            return_exceptions=True
+        )
 
-        # Then, discover from Cloud Run
-        try:
-            await self._discover_from_cloud_run()
-        except Exception as e:
-            print(f"Warning: Could not discover Cloud Run services: {e}")
+        # Merge in the original order so Cloud Run wins over env on conflicts
+        if not isinstance(env_services, Exception):
+            self.services.update(env_services)
+
+        if isinstance(cloud_services, Exception):
+            print(f"Warning: Could not discover Cloud Run services: {cloud_services}")
+        else:
+            self.services.update(cloud_services)
 
-    def _load_from_env(self):
+        self._update_snapshot()
+
+    def _load_from_env(self) -> Dict[str, str]:
         """Load service URLs from environment variables"""
-        # Common service patterns
-        service_patterns = [
-            'DB_SERVICE_URL',
-            'STORAGE_SERVICE_URL',
-            'UI_AUTOMATION_SERVICE_URL',
-            'QUERY_SERVICE_URL',
-            'PAYMENT_SERVICE_URL',
-            'ORDER_SERVICE_URL',
-            'EMAIL_SERVICE_URL',
-            'AUTH_SERVICE_URL'
-        ]
-
-        for env_var in service_patterns:
-            url = os.getenv(env_var)
+        services = {}
+        for env_var, service_name in _ENV_TO_SERVICE.items():
+            url = os.environ.get(env_var)
             if url:
-                # Convert env var to service name
-                # e.g., DB_SERVICE_URL -> db-service
-                service_name = env_var.replace('_SERVICE_URL', '').lower().replace('_', '-')
-                self.services[service_name] = url
+                services[service_name] = url
+
+        return services
+
+    def _update_snapshot(self):
+        """Rebuild the cached service names and GraphQL endpoint URLs"""
+        self._services_snapshot = tuple(self.services)
+        self._graphql_urls = {
+            name: url if url.endswith('/graphql') else f'{url}/graphql'
+            for name, url in self.services.items()
+        }
 
-    async def _discover_from_cloud_run(self):
+    @property
+    def service_names(self) -> Tuple[str, ...]:
+        """Names of all registered services (shared, no copy per call)"""
+        return self._services_snapshot
+
+    async def _discover_from_cloud_run(self) -> Dict[str, str]:
         """Discover services from Cloud Run API"""
+        services = {}
         parent = f'projects/{self.project_id}/locations/{self.region}'
 
         try:
-            # List all Cloud Run services
-            for service in self.client.list_services(parent=parent):
+            # List all Cloud Run services (async pager, doesn't block the event loop)
+            pager = await self.client.list_services(parent=parent)
+            async for service in pager:
                 service_name = service.name.split('/')[-1]
 
                 # Don't include self (api-gateway)
@@ -77,13 +123,15 @@ class ServiceRegistry:
 
                 # Add service URL
                 if service.uri:
-                    self.services[service_name] = service.uri
+                    services[service_name] = service.uri
 
         except exceptions.PermissionDenied:
             print("Warning: No permission to list Cloud Run services")
         except Exception as e:
             print(f"Error discovering services: {e}")
 
+        return services
+
     def get_service_url(self, service_name: str) -> Optional[str]:
         """
         Get URL for a service.
@@ -119,51 +167,82 @@ class ServiceRegistry:
             ValueError: If service not found
             httpx.HTTPError: If request fails
         """
-        url = self.get_service_url(service_name)
+        url = self._graphql_urls.get(service_name)
 
         if not url:
             raise ValueError(
                 f"Service {service_name} not found. "
-                f"Available: {list(self.services.keys())}"
+                f"Available: {list(self.service_names)}"
             )
 
-        # Ensure URL has /graphql endpoint
-        if not url.endswith('/graphql'):
-            url = f'{url}/graphql'
-
-        # Prepare headers
+        # Prepare headers (User-Agent is set on the shared client)
         headers = {
-            'Content-Type': 'application/json',
-            'User-Agent': 'api-gateway/0.1.0'
+            'Content-Type': 'application/json'
         }
 
         if run_id:
             headers['X-Run-ID'] = run_id
 
         # Make request
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(
-                url,
-                json={
-                    'query': query,
-                    'variables': variables or {}
-                },
-                headers=headers
-            )
+        response = await self.http.post(
+            url,
+            content=orjson.dumps({
+                'query': query,
+                'variables': variables or {}
+            }),
+            headers=headers
+        )
 
-            response.raise_for_status()
-            result = response.json()
+        response.raise_for_status()
+        result = orjson.loads(response.content)
 
-            # Check for GraphQL errors
-            if 'errors' in result:
-                raise Exception(f"GraphQL errors from {service_name}: {result['errors']}")
+        # Check for GraphQL errors
+        if 'errors' in result:
+            raise Exception(f"GraphQL errors from {service_name}: {result['errors']}")
 
-            return result.get('data', {})
+        return result.get('data', {})
+
+    async def call_services_parallel(
+        self,
+        service_names: List[str],
+        query: str,
+        variables: Optional[Dict] = None,
+        run_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Call several services concurrently with the same GraphQL query.
+
+        Args:
+            service_names: Names of services to call
+            query: GraphQL query/mutation
+            variables: Query variables
+            run_id: Run ID for tracing
+
+        Returns:
+            Dictionary of {service_name: data}. Services that failed map to
+            {"errors": [{"message": ...}]} instead of raising.
+        """
+        responses = await asyncio.gather(
+            *[self.call_service(name, query, variables, run_id) for name in service_names],
+            return_exceptions=True
+        )
+
+        results = {}
+        for name, response in zip(service_names, responses):
+            if isinstance(response, Exception):
+                results[name] = {"errors": [{"message": str(response)}]}
+            else:
+                results[name] = response
+
+        return results
 
     async def health_check(self, service_name: str) -> bool:
         """
         Check if a service is healthy.
 
+        Results are cached for `health_ttl` seconds so repeated probes
+        don't hit the service every time.
+
         Args:
             service_name: Name of service to check
 
@@ -175,15 +254,22 @@ class ServiceRegistry:
         if not url:
             return False
 
+        now = time.monotonic()
+        cached = self._health_cache.get(service_name)
+        if cached and now - cached[0] < self._health_ttl:
+            return cached[1]
+
         # Try to hit health endpoint
         health_url = f'{url}/health'
 
         try:
-            async with httpx.AsyncClient(timeout=5.0) as client:
-                response = await client.get(health_url)
-                return response.status_code == 200
+            response = await self.http.get(health_url, timeout=5.0)
+            healthy = response.status_code == 200
         except:
-            return False
+            healthy = False
+
+        self._health_cache[service_name] = (now, healthy)
+        return healthy
 
     def list_services(self) -> Dict[str, str]:
         """
@@ -197,4 +283,10 @@ class ServiceRegistry:
     async def refresh(self):
         """Refresh service discovery"""
         self.services.clear()
+        self._health_cache.clear()
+        self._update_snapshot()
         await self.discover_services()
+
+    async def aclose(self):
+        """Close the shared HTTP client"""
+        await self.http.aclose()
@@ -0,0 +1,56 @@
+"""Shared terminal output for the deployment CLI"""
+
+import contextlib
+
+from rich.console import Console
+
+# One console for every module, instead of one per import
+console = Console()
+
+# Live spinner display shared by concurrent operations, and how many are using it
+_progress = None
+_active = 0
+
+
+def _new_progress():
+    from rich.progress import Progress, SpinnerColumn, TextColumn
+
+    return Progress(
+        SpinnerColumn(),
+        TextColumn("[progress.description]{task.description}"),
+        console=console,
+        transient=True,
+        refresh_per_second=4  # Long Cloud Builds don't need 10 redraws a second
+    )
+
+
+@contextlib.contextmanager
+def spinner(description: str):
+    """
+    Show a transient spinner line while waiting on a long-running operation.
+
+    Concurrent callers (parallel deploys) each get a task row in one shared
+    display, since rich allows only one live display at a time. When output
+    isn't a terminal the description is printed once instead of redrawn.
+    """
+    global _progress, _active
+
+    if not console.is_terminal:
+        console.print(f'[dim]{description}[/dim]')
+        yield
+        return
+
+    if _active == 0:
+        _progress = _new_progress()
+        _progress.start()
+    _active += 1
+    task = _progress.add_task(description, total=None)
+
+    try:
+        yield
+    finally:
+        _progress.remove_task(task)
+        _active -= 1
+        if _active == 0:
+            _progress.stop()
+            _progress = None
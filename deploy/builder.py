@@ -1,49 +1,152 @@
 """Cloud Build API client for building container images"""
 
 from pathlib import Path
-from typing import Optional
+from typing import Awaitable, Optional
+from google.cloud import storage
 from google.cloud.devtools import cloudbuild_v1
 from google.cloud.devtools.cloudbuild_v1.types import Build, BuildStep, Source, StorageSource
-from google.cloud import storage
 from google.api_core import exceptions
-from rich.console import Console
-from rich.progress import Progress, SpinnerColumn, TextColumn
+import pathspec
+import asyncio
+import hashlib
+import os
 import tarfile
-import io
+import shutil
+import subprocess
+import threading
 import time
 
+from ._ui import console, spinner
+from .clients import Clients
 from .config import Config
 from .registry import ArtifactRegistry
 
-console = Console()
+# Resumable upload chunk size for streamed source archives
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+
+# tarfile's default 16 KiB copy/stream buffers mean many small writes per file
+TAR_BUFFER_SIZE = 2 * 1024 * 1024
+
+# Never worth shipping to Cloud Build, whatever the ignore files say
+DEFAULT_EXCLUDES = ['.git/', '__pycache__/', '*.pyc']
+
+# Pack lifecycle/builder used when a service has no Dockerfile
+PACK_BUILDER = 'gcr.io/buildpacks/builder:v1'
+
+
+class _CountingWriter:
+    """Wrap a writable file object and count the bytes passed through"""
+
+    def __init__(self, fileobj):
+        self.fileobj = fileobj
+        self.bytes_written = 0
+
+    def write(self, data) -> int:
+        self.fileobj.write(data)
+        self.bytes_written += len(data)
+        return len(data)
+
+
+class _SourceFilter:
+    """
+    tarfile filter for one source root.
+
+    Honors the root's .gcloudignore (or .dockerignore) plus DEFAULT_EXCLUDES,
+    and counts what it drops.
+    """
+
+    def __init__(self, root: Path, arcname: str):
+        self.arcname = arcname
+        self.skipped_entries = 0
+        self.skipped_bytes = 0
+
+        lines = list(DEFAULT_EXCLUDES)
+        for ignore_name in ('.gcloudignore', '.dockerignore'):
+            ignore_file = root / ignore_name
+            if ignore_file.exists():
+                lines += ignore_file.read_text().splitlines()
+                break
+
+        self.spec = pathspec.PathSpec.from_lines('gitwildmatch', lines)
+
+    def excludes(self, relpath: str, is_dir: bool) -> bool:
+        """Whether a path relative to the root should be left out"""
+        if not relpath:
+            return False
+        return self.spec.match_file(f'{relpath}/' if is_dir else relpath)
+
+    def __call__(self, tarinfo: tarfile.TarInfo) -> Optional[tarfile.TarInfo]:
+        relpath = tarinfo.name[len(self.arcname) + 1:] if tarinfo.name != self.arcname else ''
+
+        if self.excludes(relpath, tarinfo.isdir()):
+            self.skipped_entries += 1
+            self.skipped_bytes += tarinfo.size
+            return None
+
+        return tarinfo
 
 
 class CloudBuilder:
     """Build container images using Cloud Build API"""
 
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, clients: Optional[Clients] = None,
+                 registry: Optional[ArtifactRegistry] = None):
         self.config = config
-        self.client = cloudbuild_v1.CloudBuildClient()
-        self.storage_client = storage.Client(project=config.project_id)
-        self.registry = ArtifactRegistry(config)
+        self._clients = clients or Clients.shared(config.project_id)
+        self.registry = registry or ArtifactRegistry(config, self._clients)
+
+    @property
+    def client(self) -> cloudbuild_v1.CloudBuildAsyncClient:
+        # Resolved lazily so the async client is created inside the event loop
+        return self._clients.build
+
+    @property
+    def storage_client(self) -> storage.Client:
+        # Resolved lazily so building a CloudBuilder doesn't run ADC discovery
+        return self._clients.storage
 
     async def build_service(self, service_name: str, service_path: Path,
-                           version: str) -> str:
-        """Build service using Cloud Build"""
+                           version: str,
+                           repository_ready: Optional[Awaitable] = None) -> str:
+        """
+        Build service using Cloud Build.
+
+        If `repository_ready` is given (e.g. a task already running
+        ensure_repository), it is awaited just before the build is submitted
+        instead of checking the repository up front.
+        """
 
         image_name = self.config.get_image_url(service_name, version)
 
+        # Layer cache image shared by every build of this service
+        cache_image = self.config.get_image_url(service_name, 'cache')
+
         console.print(f'[cyan]Building {service_name}@{version}...[/cyan]')
 
-        # Ensure artifact registry repository exists
-        await self.registry.ensure_repository()
+        # Content hash of everything that goes into the build context
+        source_hash = await asyncio.to_thread(self._source_hash, service_path)
+        source_image = self.config.get_image_url(service_name, f'src-{source_hash}')
+
+        # Same inputs were already built: reuse that image instead of rebuilding
+        if await self.registry.image_exists(source_image):
+            console.print(f'[green]+ Source unchanged, reusing {source_image}[/green]')
+            if await self.registry.tag_image(source_image, version):
+                return image_name
+            return source_image
 
         # Source bucket name
         source_bucket = f'{self.config.project_id}_cloudbuild'
-        source_object = f'source/{service_name}-{version}.tar.gz'
+        # Keyed by content hash, so identical sources are uploaded only once
+        source_object = f'source/{service_name}-{source_hash}.tar.gz'
+
+        # Upload source to GCS; the storage client is sync, so keep it off the loop
+        await asyncio.to_thread(self._upload_source, service_path, source_bucket, source_object)
 
-        # Upload source to GCS
-        await self._upload_source(service_path, source_bucket, source_object)
+        # Ensure artifact registry repository exists before pushing to it
+        if repository_ready is None:
+            await self.registry.ensure_repository()
+        else:
+            await repository_ready
 
         # Create build configuration
         build = Build()
@@ -60,36 +163,49 @@ class CloudBuilder:
         dockerfile_path = service_path / 'Dockerfile'
         if dockerfile_path.exists():
             # Use Docker build with layer caching
-            # --cache-from enables reuse of layers from previous builds
-            # Docker ignores missing cache sources, so this is safe even for first builds
+            # Pull the cache image first so --cache-from has local layers to reuse;
+            # the pull is allowed to fail on the very first build
             build.steps = [
+                BuildStep(
+                    name='gcr.io/cloud-builders/docker',
+                    args=['pull', cache_image],
+                    allow_failure=True
+                ),
                 BuildStep(
                     name='gcr.io/cloud-builders/docker',
                     args=[
                         'build',
                         '-t', image_name,
-                        '--cache-from', image_name,  # Use previous build as cache
+                        '-t', source_image,
+                        '-t', cache_image,
+                        '--cache-from', cache_image,  # Use previous build as cache
                         '.'
                     ]
                 )
             ]
+
+            # Output images
+            build.images = [image_name, source_image, cache_image]
         else:
-            # Use buildpacks for automatic detection
+            # Use buildpacks for automatic detection, with layers cached in the registry
             build.steps = [
                 BuildStep(
                     name='gcr.io/k8s-skaffold/pack',
                     args=[
                         'build',
                         image_name,
-                        '--builder', 'gcr.io/buildpacks/builder:v1',
+                        '--builder', PACK_BUILDER,
+                        '--trust-builder',
                         '--path', '.',
+                        '--tag', source_image,
+                        '--cache-image', cache_image,
                         '--publish'
                     ]
                 )
             ]
 
-        # Output images
-        build.images = [image_name]
+            # Output images
+            build.images = [image_name]
 
         # Build options for better performance
         build.options = cloudbuild_v1.BuildOptions(
@@ -98,22 +214,16 @@ class CloudBuilder:
         )
 
         # Submit build
-        with Progress(
-            SpinnerColumn(),
-            TextColumn("[progress.description]{task.description}"),
-            console=console,
-            transient=True
-        ) as progress:
-            task = progress.add_task(f"Building {service_name}...", total=None)
-
+        with spinner(f"Building {service_name}..."):
             try:
-                operation = self.client.create_build(
+                operation = await self.client.create_build(
                     project_id=self.config.project_id,
                     build=build
                 )
 
-                # Wait for build to complete (with timeout)
-                result = operation.result(timeout=600)  # 10 min timeout
+                # Async LRO polling with backoff; the event loop stays free,
+                # so parallel deploys actually overlap their builds
+                result = await operation.result(timeout=600)  # 10 min timeout
 
             except Exception as e:
                 console.print(f'[red]X Build failed: {e}[/red]')
@@ -133,9 +243,52 @@ class CloudBuilder:
 
             raise Exception(f'Build failed: {error_msg}')
 
-    async def _upload_source(self, source_path: Path, bucket_name: str,
-                            object_name: str):
-        """Upload source code to Cloud Storage"""
+    def _source_hash(self, source_path: Path) -> str:
+        """Hash the files that make up the build context (blocking)"""
+        digest = hashlib.blake2b(digest_size=8)
+
+        for root, arcname in self._source_roots(source_path):
+            source_filter = _SourceFilter(root, arcname)
+
+            for dirpath, dirnames, filenames in os.walk(root):
+                reldir = Path(dirpath).relative_to(root).as_posix()
+                reldir = '' if reldir == '.' else f'{reldir}/'
+
+                # Prune ignored directories so we never walk into them
+                dirnames[:] = sorted(
+                    d for d in dirnames
+                    if not source_filter.excludes(f'{reldir}{d}', is_dir=True)
+                )
+
+                for filename in sorted(filenames):
+                    relpath = f'{reldir}{filename}'
+                    if source_filter.excludes(relpath, is_dir=False):
+                        continue
+
+                    digest.update(f'{arcname}/{relpath}'.encode())
+                    digest.update(b'\0')
+                    with open(os.path.join(dirpath, filename), 'rb') as f:
+                        while chunk := f.read(TAR_BUFFER_SIZE):
+                            digest.update(chunk)
+                    digest.update(b'\0')
+
+        return digest.hexdigest()
+
+    def _source_roots(self, source_path: Path):
+        """(directory, arcname) pairs that make up the build context"""
+        roots = [(source_path, '.')]
+
+        # Add shared Python SDK if it exists (for services that need it)
+        project_root = source_path.parent.parent  # Go up from services/<service-name>
+        shared_sdk_path = project_root / 'shared' / 'python'
+        if shared_sdk_path.exists():
+            roots.append((shared_sdk_path, 'shared/python'))
+
+        return roots
+
+    def _upload_source(self, source_path: Path, bucket_name: str,
+                       object_name: str):
+        """Upload source code to Cloud Storage (blocking; run in a worker thread)"""
 
         console.print(f'[dim]Uploading source...[/dim]')
 
@@ -150,29 +303,104 @@ class CloudBuilder:
             )
             console.print(f'[dim]Created bucket: {bucket_name}[/dim]')
 
-        # Create tar.gz of source code
-        tar_buffer = io.BytesIO()
+        # Object names are content-addressed: if it's there, it's the same source
+        if bucket.get_blob(object_name) is not None:
+            console.print(f'[dim]+ Source already uploaded, skipping[/dim]')
+            return
+
+        # Stream tar.gz straight into a resumable upload, no in-memory archive
+        blob = bucket.blob(object_name, chunk_size=UPLOAD_CHUNK_SIZE)
+        # Payload is already gzip; make sure it's stored as-is, not re-encoded
+        blob.content_encoding = None
+
+        try:
+            # if_generation_match=0: only create, never overwrite a concurrent upload
+            with blob.open('wb', content_type='application/gzip',
+                           if_generation_match=0) as upload:
+                writer = _CountingWriter(upload)
+
+                if shutil.which('pigz'):
+                    # Parallel compression: uncompressed tar -> pigz -> upload
+                    self._write_archive_pigz(source_path, writer)
+                else:
+                    with tarfile.open(fileobj=writer, mode='w|gz',
+                                      bufsize=TAR_BUFFER_SIZE,
+                                      copybufsize=TAR_BUFFER_SIZE) as tar:
+                        self._add_sources(tar, source_path)
+
+        except exceptions.PreconditionFailed:
+            console.print(f'[dim]+ Source already uploaded, skipping[/dim]')
+            return
+
+        console.print(f'[dim]+ Uploaded source ({writer.bytes_written // 1024} KB)[/dim]')
+
+    def _add_sources(self, tar: tarfile.TarFile, source_path: Path):
+        """Add service files (and the shared SDK) to an open archive"""
+        skipped_entries = 0
+        skipped_bytes = 0
+
+        for root, arcname in self._source_roots(source_path):
+            source_filter = _SourceFilter(root, arcname)
+            tar.add(root, arcname=arcname, filter=source_filter)
+            skipped_entries += source_filter.skipped_entries
+            skipped_bytes += source_filter.skipped_bytes
+
+        if skipped_entries:
+            console.print(f'[dim]  Skipped {skipped_entries} ignored entries '
+                          f'({skipped_bytes // 1024} KB of files, excluding ignored directories)[/dim]')
+
+    def _write_archive_pigz(self, source_path: Path, writer: _CountingWriter):
+        """Write a tar.gz of the sources using an external pigz process"""
+        pigz = subprocess.Popen(
+            ['pigz', '-c', '-1'],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE
+        )
+
+        # Upload error raised on the pump thread, re-raised here
+        pump_error: list = []
+
+        # Drain pigz output on a separate thread so neither pipe fills up
+        def pump():
+            try:
+                while chunk := pigz.stdout.read(TAR_BUFFER_SIZE):
+                    writer.write(chunk)
+            except BaseException as e:
+                pump_error.append(e)
+                # Nothing reads pigz's output any more: stop it, so the tar
+                # writer gets a broken pipe instead of blocking forever
+                pigz.kill()
 
-        with tarfile.open(fileobj=tar_buffer, mode='w:gz') as tar:
-            # Add all files in service directory
-            tar.add(source_path, arcname='.')
+        pump_thread = threading.Thread(target=pump, daemon=True)
+        pump_thread.start()
 
-            # Add shared Python SDK if it exists (for services that need it)
-            project_root = source_path.parent.parent  # Go up from services/<service-name>
-            shared_sdk_path = project_root / 'shared' / 'python'
-            if shared_sdk_path.exists():
-                tar.add(shared_sdk_path, arcname='shared/python')
+        try:
+            with tarfile.open(fileobj=pigz.stdin, mode='w|',
+                              bufsize=TAR_BUFFER_SIZE,
+                              copybufsize=TAR_BUFFER_SIZE) as tar:
+                self._add_sources(tar, source_path)
+        except OSError:
+            # A broken pipe after a failed upload; the upload error is the real one
+            if not pump_error:
+                raise
+        finally:
+            try:
+                pigz.stdin.close()
+            except OSError:
+                if not pump_error:
+                    raise
+            pump_thread.join()
+            pigz.wait()
 
-        # Upload to GCS
-        blob = bucket.blob(object_name)
-        tar_buffer.seek(0)
-        blob.upload_from_file(tar_buffer, content_type='application/gzip')
+        if pump_error:
+            raise pump_error[0]
 
-        console.print(f'[dim]+ Uploaded source ({len(tar_buffer.getvalue()) // 1024} KB)[/dim]')
+        if pigz.returncode != 0:
+            raise Exception(f'pigz failed with exit code {pigz.returncode}')
 
-    def get_build_logs(self, build_id: str) -> str:
+    async def get_build_logs(self, build_id: str) -> str:
         """Get logs for a specific build"""
-        build = self.client.get_build(
+        build = await self.client.get_build(
             project_id=self.config.project_id,
             id=build_id
         )
@@ -3,15 +3,13 @@
 import asyncio
 import typer
 from pathlib import Path
-from rich.console import Console
-from rich.table import Table
 from typing import List, Optional
 
+from ._ui import console
 from .deployer import ServiceDeployer
 from .config import Config
 
 app = typer.Typer(help="GCP Microservices Playground Deployment CLI")
-console = Console()
 
 
 def load_config() -> Config:
@@ -81,6 +79,8 @@ def status():
     deployer = ServiceDeployer(config)
 
     # Create table
+    from rich.table import Table
+
     table = Table(title="Service Deployment Status")
     table.add_column("Service", style="cyan", no_wrap=True)
     table.add_column("Production", style="green")
@@ -93,17 +93,22 @@ def status():
         console.print('[yellow]No services directory found[/yellow]')
         return
 
-    for service_path in sorted(services_dir.iterdir()):
-        if not service_path.is_dir() or service_path.name.startswith('.'):
-            continue
+    names = [
+        p.name for p in sorted(services_dir.iterdir())
+        if p.is_dir() and not p.name.startswith('.')
+    ]
+
+    # Read every .deployed file in parallel
+    records = deployer.load_deployment_records(names)
 
-        record = deployer.load_deployment_record(service_path.name)
+    for name in names:
+        record = records[name]
 
         prod_version = record.get('production', {}).get('version', '-')
         staging_version = record.get('staging', {}).get('version', '-')
         dev_version = record.get('dev', {}).get('version', '-')
 
-        table.add_row(service_path.name, prod_version, staging_version, dev_version)
+        table.add_row(name, prod_version, staging_version, dev_version)
 
     console.print(table)
 
@@ -116,12 +121,17 @@ def services():
 
     console.print(f'\n[bold]Cloud Run Services in {config.project_id}[/bold]\n')
 
-    services_list = asyncio.run(deployer.runner.list_services())
+    async def collect():
+        return [svc async for svc in deployer.runner.list_services()]
+
+    services_list = asyncio.run(collect())
 
     if not services_list:
         console.print('[yellow]No services found[/yellow]')
         return
 
+    from rich.table import Table
+
     table = Table()
     table.add_column("Service", style="cyan")
     table.add_column("URL", style="blue")
@@ -157,6 +167,8 @@ def images(
     if service:
         images_list = [img for img in images_list if img['name'] == service]
 
+    from rich.table import Table
+
     table = Table()
     table.add_column("Service", style="cyan")
     table.add_column("Version", style="green")
@@ -0,0 +1,58 @@
+"""Shared Google Cloud clients for one CLI invocation"""
+
+import functools
+from dataclasses import dataclass
+from typing import Dict
+
+import google.auth
+from google.auth.credentials import Credentials
+from google.cloud import artifactregistry_v1, run_v2, storage
+from google.cloud.devtools import cloudbuild_v1
+
+
+@dataclass
+class Clients:
+    """
+    Google Cloud API clients sharing a single set of credentials.
+
+    Credentials and each client are created on first use, so commands
+    that never touch GCP don't pay for ADC discovery or channel setup.
+    Async clients must first be touched inside the running event loop,
+    since their gRPC channel binds to the loop it was created in.
+    """
+
+    project_id: str
+
+    @classmethod
+    def shared(cls, project_id: str) -> 'Clients':
+        """Process-wide Clients for a project, so every component reuses one channel per API"""
+        clients = _SHARED.get(project_id)
+        if clients is None:
+            clients = _SHARED[project_id] = cls(project_id)
+        return clients
+
+    @functools.cached_property
+    def credentials(self) -> Credentials:
+        credentials, _ = google.auth.default()
+        return credentials
+
+    @functools.cached_property
+    def build(self) -> cloudbuild_v1.CloudBuildAsyncClient:
+        return cloudbuild_v1.CloudBuildAsyncClient(credentials=self.credentials)
+
+    @functools.cached_property
+    def registry(self) -> artifactregistry_v1.ArtifactRegistryAsyncClient:
+        return artifactregistry_v1.ArtifactRegistryAsyncClient(credentials=self.credentials)
+
+    @functools.cached_property
+    def run(self) -> run_v2.ServicesAsyncClient:
+        return run_v2.ServicesAsyncClient(credentials=self.credentials)
+
+    @functools.cached_property
+    def storage(self) -> storage.Client:
+        return storage.Client(project=self.project_id, credentials=self.credentials)
+
+
+# Shared Clients by project. Each CLI command runs a single event loop,
+# so the async channels created inside it stay valid for the whole command.
+_SHARED: Dict[str, Clients] = {}
@@ -5,6 +5,30 @@ from pathlib import Path
 from typing import Optional, Dict
 import json
 
+try:
+    import orjson
+except ImportError:  # Optional speedup, fall back to stdlib json
+    orjson = None
+
+
+def _loads_json(data: bytes):
+    """Parse JSON bytes (orjson when installed)"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _dumps_json(obj) -> bytes:
+    """Serialize to indented JSON bytes (orjson when installed)"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(obj, indent=2).encode()
+
+
+def _read_json(path: Path):
+    """Load a JSON file without decoding it to str first"""
+    return _loads_json(path.read_bytes())
+
 
 class Config(BaseModel):
     """Deployment configuration"""
@@ -13,6 +37,7 @@ class Config(BaseModel):
     region: str = Field(default='us-central1', description="GCP Region")
     artifact_registry: str = Field(default='services', description="Artifact Registry repository name")
     environments: Optional[Dict[str, Dict]] = Field(default=None, description="Environment configurations")
+    max_parallel_deploys: int = Field(default=8, description="Concurrent deploys / Cloud Run admin calls")
 
     @classmethod
     def from_file(cls, config_path: Path) -> 'Config':
@@ -20,7 +45,7 @@ class Config(BaseModel):
         if not config_path.exists():
             raise FileNotFoundError(f"Config file not found: {config_path}")
 
-        data = json.loads(config_path.read_text())
+        data = _read_json(config_path)
         return cls(**data)
 
     @classmethod
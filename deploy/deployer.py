@@ -1,20 +1,33 @@
 """Main service deployment orchestrator"""
 
+import asyncio
+import functools
+import os
 from pathlib import Path
 from datetime import datetime
-from typing import Optional, Dict, List
-import json
+from typing import Optional, Dict, List, Tuple
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from git import Repo
-from google.cloud import storage
-from rich.console import Console
-from rich.progress import Progress
 
+try:
+    import fcntl
+except ImportError:  # Not available on Windows
+    fcntl = None
+
+from ._ui import console
 from .builder import CloudBuilder
+from .clients import Clients
 from .registry import ArtifactRegistry
 from .runner import CloudRunDeployer
-from .config import Config
+from .config import Config, _loads_json, _dumps_json, _read_json
+
+# (service_name, env, version, image, url) for one successful deploy
+DeployResult = Tuple[str, str, str, str, str]
 
-console = Console()
+
+class DeployError(Exception):
+    """A service's deploy failed (already reported on the console)"""
 
 
 class ServiceDeployer:
@@ -24,38 +37,85 @@ class ServiceDeployer:
         self.config = config
         self.repo_root = Path(__file__).parent.parent
         self.repo = Repo(self.repo_root)
-
-        # Initialize Google Cloud clients
-        self.builder = CloudBuilder(config)
-        self.registry = ArtifactRegistry(config)
-        self.runner = CloudRunDeployer(config)
-        self.storage_client = storage.Client(project=config.project_id)
-
-    def get_git_sha(self) -> str:
-        """Get current git SHA for versioning"""
-        return self.repo.head.commit.hexsha[:8]
-
-    def get_git_user(self) -> str:
-        """Get current git user email"""
+        # has_changes answers by (service_name, since_sha)
+        self._changes_cache: Dict[tuple, bool] = {}
+        # services/<name> directories, built once per name
+        self._service_dirs: Dict[str, Path] = {}
+        # All deployment records in one file: {service_name: {env: record}}
+        self._index_path = self.repo_root / 'deploy' / 'deployments.json'
+        self._index: Optional[Dict[str, Dict]] = None
+
+    # Google Cloud clients are created on first use, so commands that
+    # only read local state (list, status, info) never set them up
+
+    @functools.cached_property
+    def clients(self) -> Clients:
+        return Clients.shared(self.config.project_id)
+
+    @functools.cached_property
+    def registry(self) -> ArtifactRegistry:
+        return ArtifactRegistry(self.config, self.clients)
+
+    @functools.cached_property
+    def builder(self) -> CloudBuilder:
+        return CloudBuilder(self.config, self.clients, registry=self.registry)
+
+    @functools.cached_property
+    def runner(self) -> CloudRunDeployer:
+        return CloudRunDeployer(self.config, self.clients)
+
+    @functools.cached_property
+    def storage_client(self):
+        return self.clients.storage
+
+    @functools.cached_property
+    def git_sha(self) -> str:
+        """Current git SHA for versioning (resolved once per deployer)"""
+        out = subprocess.check_output(
+            ['git', '-C', str(self.repo_root), 'rev-parse', 'HEAD'],
+            text=True
+        )
+        return out.strip()[:8]
+
+    @functools.cached_property
+    def git_user(self) -> str:
+        """Current git user email (read once per deployer)"""
         try:
             return self.repo.config_reader().get_value("user", "email", default="unknown")
         except:
             return "unknown"
 
+    def service_dir(self, service_name: str) -> Path:
+        """Path to services/<service_name>"""
+        path = self._service_dirs.get(service_name)
+        if path is None:
+            path = self._service_dirs[service_name] = self.repo_root / 'services' / service_name
+        return path
+
     def has_changes(self, service_name: str, since_sha: str) -> bool:
         """Check if service code changed since last deploy"""
+        key = (service_name, since_sha)
+        if key in self._changes_cache:
+            return self._changes_cache[key]
+
         service_path = f'services/{service_name}'
 
         try:
-            # Get diff between commits for service directory
-            old_commit = self.repo.commit(since_sha)
-            new_commit = self.repo.head.commit
-
-            diff = old_commit.diff(new_commit, paths=service_path)
-            return len(diff) > 0
+            # Let git compute the diff instead of loading trees into Python
+            out = subprocess.run(
+                ['git', '-C', str(self.repo_root), 'diff', '--name-only',
+                 since_sha, 'HEAD', '--', service_path],
+                capture_output=True,
+                text=True,
+                check=True
+            )
+            changed = bool(out.stdout.strip())
         except:
             # If error (e.g., commit not found), assume changes
-            return True
+            changed = True
+
+        self._changes_cache[key] = changed
+        return changed
 
     def create_git_tag(self, service_name: str, version: str, env: str):
         """Create git tag for deployment"""
@@ -74,10 +134,10 @@ class ServiceDeployer:
 
     def load_service_config(self, service_name: str) -> Dict:
         """Load service configuration"""
-        config_file = self.repo_root / 'services' / service_name / 'config.json'
+        config_file = self.service_dir(service_name) / 'config.json'
 
         if config_file.exists():
-            return json.loads(config_file.read_text())
+            return _read_json(config_file)
 
         # Default config
         return {
@@ -90,47 +150,142 @@ class ServiceDeployer:
             'env': {}
         }
 
+    def _load_index(self) -> Dict[str, Dict]:
+        """Read deployments.json once; empty if it doesn't exist yet"""
+        if self._index is None:
+            if self._index_path.exists():
+                self._index = _read_json(self._index_path)
+            else:
+                self._index = {}
+        return self._index
+
     def load_deployment_record(self, service_name: str) -> Dict:
         """Load deployment record"""
-        deployed_file = self.repo_root / 'services' / service_name / '.deployed'
+        index = self._load_index()
+        if service_name in index:
+            return index[service_name]
+
+        # Deprecated per-service record, for services not yet in the index
+        deployed_file = self.service_dir(service_name) / '.deployed'
 
         if deployed_file.exists():
-            return json.loads(deployed_file.read_text())
+            return _read_json(deployed_file)
         return {}
 
-    def save_deployment_record(self, service_name: str, env: str,
-                               version: str, image: str, url: str):
-        """Save deployment record"""
-        deployed_file = self.repo_root / 'services' / service_name / '.deployed'
+    def load_deployment_records(self, service_names: List[str]) -> Dict[str, Dict]:
+        """Load deployment records for several services"""
+        index = self._load_index()
+        records = {name: index[name] for name in service_names if name in index}
 
-        data = self.load_deployment_record(service_name)
+        # Only services missing from the index need their own file read
+        missing = [name for name in service_names if name not in records]
+        if missing:
+            with ThreadPoolExecutor(max_workers=16) as executor:
+                records.update(zip(missing, executor.map(self.load_deployment_record, missing)))
 
-        data[env] = {
-            'version': version,
-            'image': image,
-            'url': url,
-            'deployed_at': datetime.utcnow().isoformat(),
-            'deployed_by': self.get_git_user()
+        return records
+
+    def save_deployment_record(self, service_name: str, env: str,
+                               version: str, image: str, url: str):
+        """
+        Save deployment record.
+
+        Updates deployments.json atomically, and keeps the deprecated
+        per-service .deployed file in sync (one locked read+write).
+        """
+        entries = {
+            env: {
+                'version': version,
+                'image': image,
+                'url': url,
+                'deployed_at': datetime.utcnow().isoformat(),
+                'deployed_by': self.git_user
+            }
         }
 
+        deployed_file = self.service_dir(service_name) / '.deployed'
         deployed_file.parent.mkdir(parents=True, exist_ok=True)
-        deployed_file.write_text(json.dumps(data, indent=2))
-        console.print(f'[green]+[/green] Updated deployment record')
+
+        with open(deployed_file, 'a+b') as f:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_EX)
+
+            f.seek(0)
+            content = f.read()
+            data = _loads_json(content) if content else {}
+            data.update(entries)
+
+            f.seek(0)
+            f.truncate()
+            f.write(_dumps_json(data))
+
+        console.print(f'[green]+[/green] Updated deployment record for {service_name}')
+
+        # The deprecated record only seeds services not yet in the index
+        self._update_index({service_name: entries}, {service_name: data})
+
+    def _update_index(self, entries: Dict[str, Dict], legacy: Optional[Dict[str, Dict]] = None):
+        """
+        Merge per-env entries into deployments.json (locked, replaced atomically).
+
+        The index is authoritative: a service's other envs are kept as they
+        are there. Its deprecated .deployed record (`legacy`) only seeds
+        services the index doesn't have yet.
+        """
+        self._index_path.parent.mkdir(parents=True, exist_ok=True)
+        lock_path = self._index_path.with_name(self._index_path.name + '.lock')
+
+        with open(lock_path, 'a') as lock:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+
+            # Re-read under the lock so concurrent writers don't drop each other's updates
+            index = _read_json(self._index_path) if self._index_path.exists() else {}
+            for service_name, envs in entries.items():
+                record = index.get(service_name)
+                if record is None:
+                    record = index[service_name] = dict((legacy or {}).get(service_name, {}))
+                record.update(envs)
+
+            tmp_path = self._index_path.with_name(self._index_path.name + '.tmp')
+            tmp_path.write_bytes(_dumps_json(index))
+            os.replace(tmp_path, self._index_path)
+
+        self._index = index
 
     async def deploy(self, service_name: str, env: str = 'production',
                      force: bool = False):
         """Main deployment function"""
+        try:
+            result = await self._deploy(service_name, env, force)
+        except DeployError:
+            return
+
+        if result is None:
+            return
+
+        self.save_deployment_record(*result)
+        return result[4]
+
+    async def _deploy(self, service_name: str, env: str,
+                      force: bool) -> Optional[DeployResult]:
+        """
+        Build and deploy one service; the caller saves the deployment record.
+
+        Returns None when the service is skipped as unchanged, and raises
+        DeployError (after printing why) when it can't be deployed.
+        """
         console.print(f'\n[bold] Deploying {service_name} to {env}[/bold]')
 
         # Check if service directory exists
-        service_path = self.repo_root / 'services' / service_name
+        service_path = self.service_dir(service_name)
         if not service_path.exists():
             console.print(f'[red]X Service not found: {service_name}[/red]')
             console.print(f'[dim]Path checked: {service_path}[/dim]')
-            return
+            raise DeployError(f'Service not found: {service_name}')
 
         # 1. Get version (git SHA)
-        version = self.get_git_sha()
+        version = self.git_sha
         console.print(f'[cyan] Version:[/cyan] {version}')
 
         # 2. Check if rebuild needed
@@ -149,54 +304,92 @@ class ServiceDeployer:
                 console.print(f'[dim]Use --force to redeploy[/dim]')
                 return
 
+        # Independent prep work runs alongside hashing/uploading the source
+        registry_task = asyncio.create_task(self.registry.ensure_repository())
+        config_task = asyncio.create_task(
+            asyncio.to_thread(self.load_service_config, service_name)
+        )
+
         # 3. Build image using Cloud Build
         try:
-            image_name = await self.builder.build_service(service_name, service_path, version)
+            image_name = await self.builder.build_service(
+                service_name, service_path, version,
+                repository_ready=registry_task
+            )
         except Exception as e:
             console.print(f'[red]X Build failed: {e}[/red]')
-            return
+            config_task.cancel()
+            await asyncio.gather(config_task, return_exceptions=True)
+            raise DeployError(f'Build failed: {e}') from e
+        finally:
+            registry_task.cancel()  # no-op once it has finished
+            # Collect its outcome: an ensure_repository failure the build never
+            # awaited would otherwise surface later as "exception never retrieved"
+            await asyncio.gather(registry_task, return_exceptions=True)
 
         # 4. Deploy to Cloud Run
         try:
-            service_config = self.load_service_config(service_name)
+            service_config = await config_task
             url = await self.runner.deploy_service(
                 service_name=service_name,
                 image=image_name,
                 env=env,
-                config=service_config
+                config=service_config,
+                # The build may have pushed a new image under the same tag
+                force=True
             )
         except Exception as e:
             console.print(f'[red]X Deployment failed: {e}[/red]')
-            return
-
-        # 5. Save deployment record
-        self.save_deployment_record(service_name, env, version, image_name, url)
+            raise DeployError(f'Deployment failed: {e}') from e
 
-        # 6. Create git tag
+        # 5. Create git tag
         self.create_git_tag(service_name, version, env)
 
         console.print(f'\n[bold green] Successfully deployed {service_name}@{version}[/bold green]')
         console.print(f'[blue] URL:[/blue] {url}')
 
-        return url
+        return (service_name, env, version, image_name, url)
 
     async def deploy_multiple(self, service_names: List[str],
                              env: str = 'production', parallel: bool = True):
         """Deploy multiple services"""
-        import asyncio
-
         console.print(f'\n[bold] Deploying {len(service_names)} services[/bold]')
 
+        async def deploy_and_save(name: str):
+            result = await self._deploy(name, env, False)
+            # Save as each deploy finishes, so an interrupted batch keeps the
+            # records of services that already went out
+            if result is not None:
+                self.save_deployment_record(*result)
+            return result
+
         if parallel:
-            # Deploy in parallel
-            tasks = [self.deploy(name, env) for name in service_names]
-            await asyncio.gather(*tasks, return_exceptions=True)
+            # Deploy in parallel, bounded so we don't exhaust Cloud Build quota
+            semaphore = asyncio.Semaphore(self.config.max_parallel_deploys)
+
+            async def deploy_bounded(name: str):
+                async with semaphore:
+                    return await deploy_and_save(name)
+
+            tasks = [deploy_bounded(name) for name in service_names]
+            results = await asyncio.gather(*tasks, return_exceptions=True)
         else:
             # Deploy sequentially
+            results = []
             for name in service_names:
-                await self.deploy(name, env)
+                try:
+                    results.append(await deploy_and_save(name))
+                except Exception as e:
+                    results.append(e)
 
-        console.print('\n[bold green] All deployments complete[/bold green]')
+        failed = [(name, r) for name, r in zip(service_names, results) if isinstance(r, BaseException)]
+        for name, error in failed:
+            console.print(f'[red]X {name} failed: {error}[/red]')
+
+        if failed:
+            console.print(f'\n[bold yellow] Deployments complete, {len(failed)} failed[/bold yellow]')
+        else:
+            console.print('\n[bold green] All deployments complete[/bold green]')
 
     async def rollback(self, service_name: str, to_version: str,
                       env: str = 'production'):
@@ -250,8 +443,10 @@ class ServiceDeployer:
                 if p.is_dir() and not p.name.startswith('.')
             ]
 
+        records = self.load_deployment_records(services)
+
         for name in services:
-            record = self.load_deployment_record(name)
+            record = records[name]
 
             if not record:
                 continue
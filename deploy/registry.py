@@ -1,62 +1,106 @@
 """Artifact Registry API client for managing container images"""
 
+import asyncio
 from google.cloud import artifactregistry_v1
-from google.cloud.artifactregistry_v1 import Repository
+from google.cloud.artifactregistry_v1 import Repository, Tag
 from google.api_core import exceptions
-from rich.console import Console
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
 
+from ._ui import console
+from .clients import Clients
 from .config import Config
 
-console = Console()
-
 
 class ArtifactRegistry:
     """Manage container images in Artifact Registry"""
 
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, clients: Optional[Clients] = None):
         self.config = config
-        self.client = artifactregistry_v1.ArtifactRegistryClient()
+        self._clients = clients or Clients.shared(config.project_id)
 
-    async def image_exists(self, image_name: str) -> bool:
-        """Check if image exists in registry"""
+    @property
+    def client(self) -> artifactregistry_v1.ArtifactRegistryAsyncClient:
+        # Resolved lazily so the async client is created inside the event loop
+        return self._clients.registry
+
+    def _parse_image(self, image_name: str) -> Optional[Tuple[str, str, str]]:
+        """Split an image URL into (repository parent, image name, tag)"""
         # Parse image name: region-docker.pkg.dev/project/repo/image:tag
         parts = image_name.split('/')
 
         if len(parts) < 3:
-            return False
+            return None
 
         repository = parts[-2]  # e.g., 'services'
         image_with_tag = parts[-1]  # e.g., 'payment-service:a7b3c9d2'
         image_name_only = image_with_tag.split(':')[0]
         version_tag = image_with_tag.split(':')[1] if ':' in image_with_tag else 'latest'
 
-        try:
-            parent = (f'projects/{self.config.project_id}/locations/{self.config.region}/'
-                     f'repositories/{repository}')
-
-            # List packages (images)
-            packages = self.client.list_packages(parent=parent)
-
-            # Find the specific package
-            for package in packages:
-                pkg_name = package.name.split('/')[-1]
-                if pkg_name == image_name_only:
-                    # Check if version exists
-                    versions = self.client.list_versions(parent=package.name)
-                    for version in versions:
-                        version_name = version.name.split('/')[-1]
-                        if version_tag in version_name:
-                            return True
+        parent = (f'projects/{self.config.project_id}/locations/{self.config.region}/'
+                 f'repositories/{repository}')
+
+        return parent, image_name_only, version_tag
 
+    async def image_exists(self, image_name: str) -> bool:
+        """Check if image exists in registry"""
+        parsed = self._parse_image(image_name)
+
+        if parsed is None:
             return False
 
+        parent, image_name_only, version_tag = parsed
+
+        try:
+            # Direct tag lookup: one RPC instead of scanning versions
+            tag_name = f'{parent}/packages/{image_name_only}/tags/{version_tag}'
+            await self.client.get_tag(name=tag_name)
+            return True
+
         except exceptions.NotFound:
             return False
+        except exceptions.InvalidArgument:
+            # Name didn't form a valid tag path; fall back to scanning versions
+            return await self._find_version(parent, image_name_only, version_tag)
         except Exception as e:
             console.print(f'[dim]Could not verify image: {e}[/dim]')
             return False
 
+    async def _find_version(self, parent: str, image_name_only: str, version_tag: str) -> bool:
+        """Scan the matching package's versions for a tag"""
+        # Package name is known, so list only its versions instead of every package
+        versions = await self.client.list_versions(parent=f'{parent}/packages/{image_name_only}')
+        async for version in versions:
+            version_name = version.name.split('/')[-1]
+            if version_tag in version_name:
+                return True
+
+        return False
+
+    async def tag_image(self, image_name: str, new_tag: str) -> bool:
+        """Point an additional tag at the version behind an existing image"""
+        parsed = self._parse_image(image_name)
+
+        if parsed is None:
+            return False
+
+        parent, image_name_only, version_tag = parsed
+        package = f'{parent}/packages/{image_name_only}'
+
+        try:
+            existing = await self.client.get_tag(name=f'{package}/tags/{version_tag}')
+            await self.client.create_tag(
+                parent=package,
+                tag_id=new_tag,
+                tag=Tag(name=f'{package}/tags/{new_tag}', version=existing.version)
+            )
+            return True
+
+        except exceptions.AlreadyExists:
+            return True
+        except Exception as e:
+            console.print(f'[dim]Could not tag image: {e}[/dim]')
+            return False
+
     async def ensure_repository(self, repository_name: str = None):
         """Ensure repository exists, create if not"""
         if repository_name is None:
@@ -67,7 +111,7 @@ class ArtifactRegistry:
 
         try:
             # Try to get existing repository
-            self.client.get_repository(name=repo_path)
+            await self.client.get_repository(name=repo_path)
             console.print(f'[dim]+ Repository {repository_name} exists[/dim]')
 
         except exceptions.NotFound:
@@ -79,14 +123,14 @@ class ArtifactRegistry:
                 description=f'Container images for {repository_name}'
             )
 
-            operation = self.client.create_repository(
+            operation = await self.client.create_repository(
                 parent=parent,
                 repository_id=repository_name,
                 repository=repository
             )
 
-            # Wait for creation to complete
-            operation.result(timeout=300)
+            # Async LRO: polls with backoff while the event loop keeps running
+            await operation.result(timeout=300)
             console.print(f'[green]+ Created repository {repository_name}[/green]')
 
         except Exception as e:
@@ -104,13 +148,16 @@ class ArtifactRegistry:
         images = []
 
         try:
-            packages = self.client.list_packages(parent=parent)
+            pager = await self.client.list_packages(parent=parent)
+            packages = [package async for package in pager]
 
-            for package in packages:
-                package_name = package.name.split('/')[-1]
+            # Fetch versions for all packages concurrently
+            version_lists = await asyncio.gather(*[
+                self._list_versions(package.name) for package in packages
+            ])
 
-                # Get versions for this package
-                versions = self.client.list_versions(parent=package.name)
+            for package, versions in zip(packages, version_lists):
+                package_name = package.name.split('/')[-1]
 
                 for version in versions:
                     images.append({
@@ -125,6 +172,11 @@ class ArtifactRegistry:
 
         return images
 
+    async def _list_versions(self, package_name: str) -> List:
+        """All versions of one package"""
+        pager = await self.client.list_versions(parent=package_name)
+        return [version async for version in pager]
+
     async def delete_image(self, image_name: str, version: str):
         """Delete a specific image version"""
         parent = (f'projects/{self.config.project_id}/locations/{self.config.region}/'
@@ -133,8 +185,8 @@ class ArtifactRegistry:
         version_path = f'{parent}/versions/{version}'
 
         try:
-            operation = self.client.delete_version(name=version_path)
-            operation.result(timeout=60)
+            operation = await self.client.delete_version(name=version_path)
+            await operation.result(timeout=60)
             console.print(f'[green]+ Deleted {image_name}:{version}[/green]')
 
         except exceptions.NotFound:
@@ -1,112 +1,281 @@
 """Cloud Run API client for deploying services"""
 
-from typing import Dict, Optional, List
+from __future__ import annotations
+
+import asyncio
+import json
+import random
+import time
+from collections.abc import AsyncIterator
 from google.cloud import run_v2
 from google.cloud.run_v2 import Service, Container, TrafficTarget, EnvVar
 from google.api_core import exceptions
 from google.iam.v1 import iam_policy_pb2, policy_pb2
-from rich.console import Console
-from rich.progress import Progress, SpinnerColumn, TextColumn
+from google.protobuf import duration_pb2
 
+from ._ui import console
+from .clients import Clients
 from .config import Config
 
-console = Console()
+# Admin API errors worth retrying (quota: ~60 writes/min/project)
+RETRYABLE_ERRORS = (
+    exceptions.ResourceExhausted,
+    exceptions.ServiceUnavailable,
+    exceptions.DeadlineExceeded
+)
+MAX_ATTEMPTS = 5
+BASE_DELAY = 1.0
+MAX_DELAY = 30.0
+
+# How long a confirmed allUsers invoker binding is trusted (seconds)
+PUBLIC_ACCESS_TTL = 300.0
+
+# Env vars set on every service; these override service config
+_COMMON_ENV_NAMES = frozenset({'ENVIRONMENT', 'GCP_PROJECT', 'GCP_REGION'})
+
+# Operation polling: start quick, back off to at most this interval
+POLL_INITIAL = 0.5
+POLL_MAX = 5.0
 
 
 class CloudRunDeployer:
     """Deploy services to Cloud Run using API"""
 
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, clients: Clients | None = None,
+                 service_ttl: float = 60.0):
         self.config = config
-        self.client = run_v2.ServicesClient()
+        self._clients = clients or Clients.shared(config.project_id)
+        # Resource names are fixed per Config, so format them once
+        self._parent = f'projects/{config.project_id}/locations/{config.region}'
+        self._services_prefix = self._parent + '/services/'
+        # Recent get_service results: {service_path: (fetched_at, service or None)}
+        self._service_cache: dict[str, tuple[float, Service | None]] = {}
+        self._service_ttl = service_ttl
+        # Prebuilt Service templates by (service_name, env, config), image left blank
+        self._service_templates: dict[tuple[str, str, str], Service] = {}
+        # Services confirmed public recently: {service_path: confirmed_at}
+        self._public_cache: dict[str, float] = {}
+        # Common env vars that only depend on the Config, built once
+        self._base_env = [
+            EnvVar(name='GCP_PROJECT', value=config.project_id),
+            EnvVar(name='GCP_REGION', value=config.region)
+        ]
+        # Gate on concurrent admin RPCs so parallel deploys stay under quota
+        self._sem = asyncio.Semaphore(config.max_parallel_deploys)
+
+    @property
+    def client(self) -> run_v2.ServicesAsyncClient:
+        # Resolved lazily so the async client is created inside the event loop
+        return self._clients.run
+
+    async def _call(self, method, **kwargs):
+        """Run an admin RPC under the concurrency gate, retrying quota/transient errors"""
+        for attempt in range(MAX_ATTEMPTS):
+            try:
+                async with self._sem:
+                    return await method(**kwargs)
+            except RETRYABLE_ERRORS as e:
+                if attempt == MAX_ATTEMPTS - 1:
+                    raise
+                delay = min(MAX_DELAY, BASE_DELAY * 2 ** attempt + random.uniform(0, BASE_DELAY))
+                console.print(f'[dim]{type(e).__name__}, retrying in {delay:.1f}s...[/dim]')
+                await asyncio.sleep(delay)
+
+    async def _await_operation(self, operation, timeout: float = 600):
+        """Poll a long-running operation with capped backoff, without blocking the loop"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        delay = POLL_INITIAL
+
+        while not await operation.done():
+            if loop.time() >= deadline:
+                raise TimeoutError(f'Operation did not complete within {timeout}s')
+            await asyncio.sleep(min(delay, max(deadline - loop.time(), 0)))
+            delay = min(delay * 1.5, POLL_MAX)
+
+        return await operation.result()
 
     async def deploy_service(self, service_name: str, image: str,
-                            env: str, config: Dict) -> str:
-        """Deploy service to Cloud Run"""
+                            env: str, config: dict, force: bool = False) -> str:
+        """
+        Deploy service to Cloud Run.
 
-        console.print(f'[cyan] Deploying {service_name} to {env}...[/cyan]')
+        Creates or updates the service through the Cloud Run Admin API. If the
+        API path is unavailable, the equivalent manual command is
+        `gcloud run deploy <service> --image <image> --region <region>`.
 
-        # Try using gcloud CLI as it's more reliable
-        return await self._deploy_with_gcloud(service_name, image, env, config)
-
-    async def _deploy_with_gcloud(self, service_name: str, image: str, env: str, config: Dict) -> str:
-        """Deploy service using gcloud CLI (fallback method)"""
-        import subprocess
-        import sys
-
-        # Build gcloud command parts
-        cmd_parts = [
-            'gcloud', 'run', 'deploy', service_name,
-            '--image', image,
-            '--region', self.config.region,
-            '--project', self.config.project_id,
-            '--platform', 'managed',
-            '--memory', config.get('memory', '512Mi'),
-            '--cpu', config.get('cpu', '1'),
-            '--timeout', str(config.get('timeout', 60)),
-            '--min-instances', str(config.get('min_instances', 0)),
-            '--max-instances', str(config.get('max_instances', 100)),
-            '--quiet'
-        ]
+        An update is skipped when the live spec already matches, unless
+        `force` is set. The spec holds the image tag, not its digest, so pass
+        force whenever the tag may have been pushed again (e.g. after a build).
+        """
 
-        # Add environment variables
-        env_vars = self._build_env_vars(config, env)
-        if env_vars:
-            env_str = ','.join([f'{var.name}={var.value}' for var in env_vars])
-            # Properly quote env vars for PowerShell to prevent concatenation
-            cmd_parts.extend(['--set-env-vars', f'"{env_str}"'])
+        console.print(f'[cyan] Deploying {service_name} to {env}...[/cyan]')
 
-        # Add public access if configured
-        if config.get('allow_unauthenticated', True):
-            cmd_parts.append('--allow-unauthenticated')
+        service_path = self._service_path(service_name)
+        service = self._service_for(service_name, image, env, config)
 
         try:
-            # On Windows, use powershell to run gcloud
-            if sys.platform == 'win32':
-                # Use array form to prevent argument mangling
-                cmd_str = ' '.join(cmd_parts)
-                cmd = ['powershell', '-Command', cmd_str]
+            live = await self._live_service(service_path)
+            if not force and live is not None and self._fingerprint(live) == self._fingerprint(service):
+                # Same spec as what's running: don't roll out an identical revision
+                console.print(f'[green]+ {service_name} already up to date[/green]')
+                result = live
             else:
-                cmd = cmd_parts
+                if live is not None:
+                    service.name = service_path
+                    operation = await self._call(self.client.update_service, service=service)
+                else:
+                    try:
+                        operation = await self._call(
+                            self.client.create_service,
+                            parent=self._parent,
+                            service=service,
+                            service_id=service_name
+                        )
+                    except exceptions.AlreadyExists:
+                        # A create that timed out but went through, then retried by
+                        # _call (or a concurrent deploy): the service exists, so update it
+                        service.name = service_path
+                        operation = await self._call(self.client.update_service, service=service)
+
+                result = await self._await_operation(operation, timeout=600)
+                self._forget_service(service_path)
 
-            # Run gcloud command
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+        except Exception as e:
+            console.print(f'[red]X Deploy failed: {e}[/red]')
+            raise RuntimeError(f"Deployment failed: {e}")
 
-            # Get service URL
-            url = await self._get_service_url(service_name)
+        # Add public access if configured
+        if config.get('allow_unauthenticated', True):
+            await self._set_public_access(service_path)
+
+        url = result.uri
+        console.print(f'[green]+ Deployed to {url}[/green]')
+
+        return url
+
+    async def deploy_services(self, specs: list[tuple[str, str, str, dict]]) -> list[dict]:
+        """
+        Deploy several services concurrently.
+
+        Each spec is (service_name, image, env, config). Admin RPCs are already
+        bounded by the semaphore in _call, so operations are simply gathered.
+        Returns one dict per spec with either 'url' or 'error', in order.
+        """
+        results = await asyncio.gather(
+            *(self.deploy_service(*spec) for spec in specs),
+            return_exceptions=True
+        )
+
+        return [
+            {'service': spec[0], 'error': str(result)} if isinstance(result, BaseException)
+            else {'service': spec[0], 'url': result}
+            for spec, result in zip(specs, results)
+        ]
 
-            console.print(f'[green]+ Deployed to {url}[/green]')
-            if config.get('allow_unauthenticated', True):
-                console.print('[dim]+ Enabled public access[/dim]')
+    def _service_for(self, service_name: str, image: str, env: str, config: dict) -> Service:
+        """Copy of the memoized Service template for this config, with the image set"""
+        key = (service_name, env, json.dumps(config, sort_keys=True, default=str))
+
+        template = self._service_templates.get(key)
+        if template is None:
+            template = self._service_templates[key] = self._build_service(env, config)
+
+        # CopyFrom on the underlying proto is much cheaper than rebuilding it
+        service = Service()
+        Service.copy_from(service, template)
+        service.template.containers[0].image = image
+        return service
+
+    def _build_service(self, env: str, config: dict) -> Service:
+        """Build the Service definition for a deploy (image is filled in per call)"""
+        container = Container(
+            env=self._build_env_vars(config, env),
+            resources=run_v2.ResourceRequirements(
+                limits={
+                    'memory': config.get('memory', '512Mi'),
+                    'cpu': str(config.get('cpu', '1'))
+                }
+            )
+        )
+
+        return Service(
+            template=run_v2.RevisionTemplate(
+                containers=[container],
+                scaling=run_v2.RevisionScaling(
+                    min_instance_count=config.get('min_instances', 0),
+                    max_instance_count=config.get('max_instances', 100)
+                ),
+                timeout=duration_pb2.Duration(seconds=config.get('timeout', 60))
+            ),
+            traffic=[
+                TrafficTarget(
+                    type_=run_v2.TrafficTargetAllocationType.TRAFFIC_TARGET_ALLOCATION_TYPE_LATEST,
+                    percent=100
+                )
+            ]
+        )
 
-            return url
+    def _service_path(self, service_name: str) -> str:
+        """Full resource name of a Cloud Run service"""
+        return self._services_prefix + service_name
 
-        except subprocess.CalledProcessError as e:
-            console.print(f'[red]X gcloud deploy failed: {e.stderr}[/red]')
-            raise RuntimeError(f"Deployment failed: {e.stderr}")
+    async def _get_service(self, service_path: str) -> Service | None:
+        """
+        Fetch a service, or None if it doesn't exist.
 
-    async def _get_service_url(self, service_name: str) -> str:
-        """Get URL for a deployed service"""
-        service_path = f'projects/{self.config.project_id}/locations/{self.config.region}/services/{service_name}'
+        Results are cached for `service_ttl` seconds so the exists-check and
+        URL lookup of one deploy share a single get_service call.
+        """
+        now = time.monotonic()
+        cached = self._service_cache.get(service_path)
+        if cached and now - cached[0] < self._service_ttl:
+            return cached[1]
 
         try:
-            service = self.client.get_service(name=service_path)
-            return service.uri
-        except:
-            return f'https://{service_name}-{self.config.project_id}.{self.config.region}.run.app'
+            service = await self._call(self.client.get_service, name=service_path)
+        except exceptions.NotFound:
+            service = None
 
-    async def _service_exists(self, service_path: str) -> bool:
-        """Check if service already exists"""
+        self._service_cache[service_path] = (now, service)
+        return service
+
+    def _forget_service(self, service_path: str):
+        """Drop a cached get_service result after the service changes"""
+        self._service_cache.pop(service_path, None)
+
+    async def _live_service(self, service_path: str) -> Service | None:
+        """The deployed service, or None if it doesn't exist yet"""
         try:
-            self.client.get_service(name=service_path)
-            return True
-        except exceptions.NotFound:
-            return False
-        except Exception:
-            return False
+            return await self._get_service(service_path)
+        except (exceptions.PermissionDenied, exceptions.Unauthenticated):
+            # An auth failure isn't "missing"; creating would just 409
+            raise
+        except exceptions.GoogleAPICallError as e:
+            console.print(f'[dim]Could not look up {service_path}: {e}[/dim]')
+            return None
+
+    @staticmethod
+    def _fingerprint(service: Service) -> tuple:
+        """The parts of a service spec a deploy sets; equal means no new revision is needed"""
+        template = service.template
+        container = template.containers[0] if template.containers else Container()
+        return (
+            container.image,
+            tuple(sorted((var.name, var.value) for var in container.env)),
+            tuple(sorted(container.resources.limits.items())),
+            template.scaling.min_instance_count,
+            template.scaling.max_instance_count,
+            template.timeout,
+            tuple((t.type_, t.percent, t.revision) for t in service.traffic)
+        )
 
     async def _set_public_access(self, service_path: str):
         """Allow unauthenticated access to service"""
+        confirmed_at = self._public_cache.get(service_path)
+        if confirmed_at and time.monotonic() - confirmed_at < PUBLIC_ACCESS_TTL:
+            return
+
         try:
             # Get current policy
             policy_request = iam_policy_pb2.GetIamPolicyRequest(
@@ -114,17 +283,19 @@ class CloudRunDeployer:
             )
 
             try:
-                current_policy = self.client.get_iam_policy(request=policy_request)
-            except:
+                current_policy = await self._call(self.client.get_iam_policy, request=policy_request)
+            except exceptions.NotFound:
                 # If no policy exists, create empty one
                 current_policy = policy_pb2.Policy()
 
-            # Add allUsers as invoker
+            # Add allUsers as invoker, unless a redeploy finds it already there
             binding_found = False
             for binding in current_policy.bindings:
                 if binding.role == 'roles/run.invoker':
-                    if 'allUsers' not in binding.members:
-                        binding.members.append('allUsers')
+                    if 'allUsers' in binding.members:
+                        self._public_cache[service_path] = time.monotonic()
+                        return
+                    binding.members.append('allUsers')
                     binding_found = True
                     break
 
@@ -142,57 +313,49 @@ class CloudRunDeployer:
                 policy=current_policy
             )
 
-            self.client.set_iam_policy(request=set_policy_request)
+            await self._call(self.client.set_iam_policy, request=set_policy_request)
+            self._public_cache[service_path] = time.monotonic()
             console.print('[dim]+ Enabled public access[/dim]')
 
-        except Exception as e:
+        except exceptions.GoogleAPICallError as e:
             console.print(f'[yellow]Warning: Could not set public access: {e}[/yellow]')
 
-    def _build_env_vars(self, config: Dict, env: str) -> List[EnvVar]:
+    def _build_env_vars(self, config: dict, env: str) -> list[EnvVar]:
         """Build environment variables for Cloud Run"""
         env_config = config.get('env', {}).get(env, {})
 
-        # Add common env vars
-        env_config['ENVIRONMENT'] = env
-        env_config['GCP_PROJECT'] = self.config.project_id
-        env_config['GCP_REGION'] = self.config.region
-
-        # Convert to Cloud Run EnvVar format
-        env_vars = []
-        for key, value in env_config.items():
-            env_vars.append(EnvVar(name=key, value=str(value)))
-
-        return env_vars
-
-    async def list_services(self) -> List[Dict]:
-        """List all Cloud Run services"""
-        parent = f'projects/{self.config.project_id}/locations/{self.config.region}'
-
-        services = []
+        # Service-specific vars, then the common ones (which take precedence)
+        return [
+            EnvVar(name=key, value=value if value.__class__ is str else str(value))
+            for key, value in env_config.items()
+            if key not in _COMMON_ENV_NAMES
+        ] + [EnvVar(name='ENVIRONMENT', value=env)] + self._base_env
 
+    async def list_services(self) -> AsyncIterator[dict]:
+        """List all Cloud Run services, fetching further pages only as consumed"""
         try:
-            for service in self.client.list_services(parent=parent):
-                services.append({
-                    'name': service.name.split('/')[-1],
+            pager = await self.client.list_services(parent=self._parent)
+            async for service in pager:
+                yield {
+                    'name': service.name.rpartition('/')[2],
                     'url': service.uri,
                     'updated': service.update_time,
                     'generation': service.generation
-                })
+                }
         except Exception as e:
             console.print(f'[yellow]Warning: Could not list services: {e}[/yellow]')
 
-        return services
-
     async def delete_service(self, service_name: str):
         """Delete a Cloud Run service"""
-        service_path = (f'projects/{self.config.project_id}/locations/{self.config.region}/'
-                       f'services/{service_name}')
+        service_path = self._service_path(service_name)
 
         try:
             console.print(f'[yellow]Deleting service {service_name}...[/yellow]')
 
-            operation = self.client.delete_service(name=service_path)
-            operation.result(timeout=300)
+            operation = await self._call(self.client.delete_service, name=service_path)
+            await self._await_operation(operation, timeout=300)
+            self._forget_service(service_path)
+            self._public_cache.pop(service_path, None)
 
             console.print(f'[green]+ Deleted {service_name}[/green]')
 
@@ -202,7 +365,7 @@ class CloudRunDeployer:
             console.print(f'[red]Error deleting service: {e}[/red]')
             raise
 
-    async def get_service_logs(self, service_name: str, limit: int = 100) -> List[Dict]:
+    async def get_service_logs(self, service_name: str, limit: int = 100) -> list[dict]:
         """Get logs for a service (requires Cloud Logging API)"""
         # This would use Cloud Logging API
         # For now, return placeholder
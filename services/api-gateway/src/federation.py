@@ -14,16 +14,29 @@ without modification as long as they follow the federation contract.
 
 import httpx
 import logging
+import orjson
+import sys
 import time
 import asyncio
-from typing import Dict, List, Any, Optional, Set
-from datetime import datetime
+import functools
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Any, Optional, Set, Tuple
+from datetime import datetime, timezone
 from graphql import (
     parse,
     DocumentNode,
+    GraphQLError,
     OperationDefinitionNode,
+    OperationType,
+    ObjectTypeDefinitionNode,
+    ObjectTypeExtensionNode,
     FieldNode,
+    NameNode,
     SelectionSetNode,
+    ListTypeNode,
+    NonNullTypeNode,
+    TypeNode,
     visit,
     Visitor,
     SKIP
@@ -32,6 +45,236 @@ from graphql.language import print_ast
 
 logger = logging.getLogger(__name__)
 
+# Background workers posting execution traces, and how many traces may wait
+RUN_RECORD_WORKERS = 4
+RUN_QUEUE_MAX = 10_000
+
+# Runs whose service calls are still held for recording, and how long an
+# unrecorded run (failed request, dropped trace) is kept before it's evicted
+RUN_CALLS_MAX = 10_000
+RUN_CALLS_TTL = 300.0
+
+# Subgraph responses at least this large are decoded off the event loop
+LARGE_RESPONSE_BYTES = 128 * 1024
+
+# Built-in scalars; fields returning these never reference another type
+SCALAR_NAMES = frozenset({'ID', 'String', 'Int', 'Float', 'Boolean'})
+
+
+@dataclass
+class QueryPlan:
+    """Everything derived from a query's text alone; reused for repeated queries"""
+    query: str
+    document: DocumentNode
+    queried_fields: Set[str]
+    services: Tuple[str, ...]
+    needs_entity_resolution: bool
+    is_mutation: bool = False
+    # Per-service query text with foreign entities stubbed to `{ id }`
+    # (the original query itself when a service needs no stubbing)
+    transformed_per_service: Dict[str, str] = field(default_factory=dict)
+
+
+@dataclass(slots=True)
+class ServiceCallRecord:
+    """One subgraph call in a run; holds references only, formatted when the run is recorded"""
+    service_name: str
+    url: str
+    query: str
+    variables: Dict[str, Any]
+    output_data: Dict[str, Any]
+    duration_ms: float
+    timestamp_ns: int
+    status_code: int
+    has_errors: bool
+    error_messages: Optional[List[str]]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "service_name": self.service_name,
+            "url": self.url,
+            "query": self.query,
+            "variables": self.variables,
+            "input_data": {"query": self.query, "variables": self.variables},
+            "output_data": self.output_data,
+            "duration_ms": round(self.duration_ms, 2),
+            "timestamp": _iso_utc(self.timestamp_ns),
+            "has_errors": self.has_errors,
+            "error_messages": self.error_messages,
+            "status_code": self.status_code
+        }
+
+
+# (type_name, sorted requested fields) resolved by one aliased _entities selection
+EntityGroup = Tuple[str, Tuple[str, ...]]
+
+
+class _EntityBatch:
+    """Lookups for one run waiting on one subgraph"""
+    __slots__ = ('items', 'size', 'handle')
+
+    def __init__(self):
+        # (group, representations, future) per caller
+        self.items: List[Tuple[EntityGroup, List[Dict[str, Any]], asyncio.Future]] = []
+        self.size = 0
+        self.handle: Optional[asyncio.Handle] = None
+
+
+class EntityBatcher:
+    """
+    DataLoader-style coalescing of _entities lookups.
+
+    Lookups for the same subgraph and run that are queued in the same event
+    loop step (or until `max_batch` representations are queued) are sent as
+    a single `send(service_url, groups, run_id)` call, where groups pairs each
+    distinct (type_name, fields) with its unioned representations. Each
+    group's result list is then sliced back per caller by position, since
+    _entities returns entities in representation order.
+
+    Batches never mix runs, so every downstream call carries the X-Run-ID of
+    the request it serves. That means nothing to gain from waiting for other
+    requests: a batch is sent on the next loop iteration, once the lookups a
+    request started together have all joined it.
+    """
+
+    def __init__(self, send, max_batch: int = 256):
+        self._send = send
+        self.max_batch = max_batch
+        self._pending: Dict[Tuple[str, Optional[str]], _EntityBatch] = {}
+        # Keep in-flight sends referenced until they finish
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def load(
+        self,
+        service_url: str,
+        group: EntityGroup,
+        representations: List[Dict[str, Any]],
+        run_id: Optional[str] = None
+    ) -> Optional[List[Any]]:
+        """Queue representations for a group on a subgraph and wait for their entities"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        key = (service_url, run_id)
+        batch = self._pending.get(key)
+        if batch is None:
+            batch = self._pending[key] = _EntityBatch()
+            batch.handle = loop.call_soon(self._flush, key, batch)
+
+        batch.items.append((group, representations, future))
+        batch.size += len(representations)
+        if batch.size >= self.max_batch:
+            self._flush(key, batch)
+
+        return await future
+
+    def _flush(self, key: Tuple[str, Optional[str]], batch: _EntityBatch):
+        if self._pending.get(key) is not batch:
+            return  # Already flushed by size
+        del self._pending[key]
+        batch.handle.cancel()
+
+        task = asyncio.get_running_loop().create_task(self._run(*key, batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, service_url: str, run_id: Optional[str], batch: _EntityBatch):
+        # Union representations per group, in arrival order
+        grouped: Dict[EntityGroup, List[Dict[str, Any]]] = {}
+        for group, reps, _ in batch.items:
+            grouped.setdefault(group, []).extend(reps)
+        groups = list(grouped.items())
+
+        try:
+            results = await self._send(service_url, groups, run_id)
+        except Exception as e:
+            for _, _, future in batch.items:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        # A group whose entities can't be lined up with its representations
+        # fails only the callers waiting on that group
+        by_group: Dict[EntityGroup, Any] = {}
+        for (group, reps), entities in zip(groups, results):
+            if entities is not None and len(entities) != len(reps):
+                entities = RuntimeError(
+                    f"_entities returned {len(entities)} {group[0]} results for {len(reps)} representations"
+                )
+            by_group[group] = entities
+
+        offsets = dict.fromkeys(grouped, 0)
+        for group, reps, future in batch.items:
+            entities = by_group[group]
+            offset = offsets[group]
+            offsets[group] = offset + len(reps)
+            if future.done():
+                continue
+            if isinstance(entities, Exception):
+                future.set_exception(entities)
+            else:
+                future.set_result(None if entities is None else entities[offset:offset + len(reps)])
+
+
+async def _gather_settled(coros: List[Any]) -> List[Any]:
+    """
+    Run coroutines concurrently under a TaskGroup.
+
+    Each result is the coroutine's return value or the exception it raised,
+    so one failing subgraph doesn't cancel its siblings. Cancelling the
+    caller still cancels every child task.
+    """
+    async def settle(coro):
+        try:
+            return await coro
+        except Exception as e:
+            return e
+
+    if sys.version_info < (3, 11):
+        return await asyncio.gather(*(settle(c) for c in coros))
+
+    async with asyncio.TaskGroup() as tg:
+        tasks = [tg.create_task(settle(c)) for c in coros]
+    return [task.result() for task in tasks]
+
+
+def _iso_utc(timestamp_ns: int) -> str:
+    """Format a time.time_ns() value as ISO 8601 UTC with a Z suffix"""
+    return datetime.fromtimestamp(timestamp_ns / 1e9, tz=timezone.utc).isoformat().replace('+00:00', 'Z')
+
+
+async def _run_service_calls(calls: List[Any], is_mutation: bool) -> List[Any]:
+    """
+    Await one call per subgraph, returning responses in call order.
+
+    Queries fan out at once, so latency is the slowest subgraph rather than
+    the sum. Mutations run one service after another: GraphQL executes root
+    mutation fields serially, and their side effects must not interleave.
+    """
+    if is_mutation:
+        return [await call for call in calls]
+    return await asyncio.gather(*calls)
+
+
+async def _loads_response(raw: bytes) -> Any:
+    """
+    Decode a subgraph response body.
+
+    Large bodies are parsed in a worker thread: orjson still holds the GIL,
+    but the interpreter's switch interval lets the loop thread keep running
+    other requests' callbacks instead of stalling for the whole parse.
+    """
+    if len(raw) < LARGE_RESPONSE_BYTES:
+        return orjson.loads(raw)
+    return await asyncio.to_thread(orjson.loads, raw)
+
+
+def _unwrap_named(type_node: TypeNode) -> str:
+    """Peel NonNull/List wrappers off a field type, e.g. [Post!]! -> Post"""
+    while isinstance(type_node, (NonNullTypeNode, ListTypeNode)):
+        type_node = type_node.type
+    return type_node.name.value
+
 
 class FederationComposer:
     """
@@ -52,10 +295,68 @@ class FederationComposer:
         self.query_field_to_service: Dict[str, str] = {}
         # Map field names to their return type (e.g., "author" -> "User")
         self.field_to_return_type: Dict[str, str] = {}
+        # Entity type names, for O(1) membership checks in AST walks
+        self._entity_type_set: frozenset = frozenset()
+        # Per target service, whether a field must be stubbed to `{ id }` (foreign entity)
+        self._field_stub_map: Dict[str, Dict[str, bool]] = {}
+        # The `{ id }` selection given to stubbed entity fields; AST nodes are never
+        # mutated, so every stub shares this one instance
+        self._id_only_selection_set = SelectionSetNode(selections=(
+            FieldNode(name=NameNode(value="id"), arguments=(), directives=(), alias=None, selection_set=None),
+        ))
         # Run storage service URL (for recording execution traces)
         self.run_storage_url = run_storage_url
-        # Track service calls for each run
-        self.run_service_calls: Dict[str, List[Dict[str, Any]]] = {}
+        # Track service calls for each run: {run_id: (started_at, calls)}, oldest first
+        self.run_service_calls: Dict[str, Tuple[float, List[ServiceCallRecord]]] = {}
+        # LRU of query text -> QueryPlan (only valid for the current schemas)
+        self._plan_cache: "OrderedDict[str, QueryPlan]" = OrderedDict()
+        self._plan_cache_max = 1024
+        # Recently resolved entities: {(service_url, type, fields, id): (fetched_at, entity)}
+        self._entity_cache: Dict[Tuple, Tuple[float, Dict[str, Any]]] = {}
+        self._entity_cache_enabled = True
+        self._entity_cache_ttl = 5.0
+        self._entity_cache_max = 50_000
+        # Coalesces one request's concurrent _entities lookups per subgraph
+        self._entity_batcher = EntityBatcher(self._post_entities)
+        # Execution traces waiting to be recorded, drained by background workers
+        self._run_queue: asyncio.Queue = asyncio.Queue(maxsize=RUN_QUEUE_MAX)
+        self._run_workers: List[asyncio.Task] = []
+        # Shared HTTP client for every subgraph call, created on first use
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """
+        Return the shared subgraph HTTP client.
+
+        One pooled client keeps connections (and TLS sessions) alive across
+        requests instead of reconnecting for every query.
+        """
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                http2=True,
+                timeout=httpx.Timeout(30.0, connect=5.0),
+                limits=httpx.Limits(
+                    max_keepalive_connections=100,
+                    max_connections=200,
+                    keepalive_expiry=60.0
+                )
+            )
+        return self._client
+
+    async def aclose(self):
+        """Flush queued run traces and close the shared HTTP client (call on shutdown)"""
+        if self._run_workers:
+            try:
+                await asyncio.wait_for(self._run_queue.join(), timeout=5.0)
+            except asyncio.TimeoutError:
+                logger.warning(f"Dropping {self._run_queue.qsize()} unrecorded runs on shutdown")
+            for worker in self._run_workers:
+                worker.cancel()
+            self._run_workers = []
+
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
 
     async def fetch_subgraph_schemas(self, services: Dict[str, str]):
         """
@@ -65,28 +366,43 @@ class FederationComposer:
             services: Dict mapping service names to their URLs
         """
         self.service_urls = services
+        # Routing decisions depend on the schemas being (re)loaded here
+        self._plan_cache.clear()
+
+        client = self._get_client()
+
+        async def fetch_one(service_name: str, service_url: str) -> Optional[str]:
+            # Fetch schema SDL from subgraph
+            response = await client.get(f"{service_url}/_graphql/schema")
+            if response.status_code != 200:
+                logger.warning(f"Failed to fetch schema from {service_name}: {response.status_code}")
+                return None
+            return orjson.loads(response.content).get('sdl', '')
+
+        # Fetch all subgraphs concurrently; total time is the slowest one
+        names = list(services)
+        results = await _gather_settled([fetch_one(name, services[name]) for name in names])
+
+        # Parse after all I/O is done, in service order
+        for service_name, sdl in zip(names, results):
+            if isinstance(sdl, Exception):
+                logger.error(f"Error fetching schema from {service_name}: {sdl}")
+                continue
+            if sdl is None:
+                continue
 
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            for service_name, service_url in services.items():
-                try:
-                    # Fetch schema SDL from subgraph
-                    schema_url = f"{service_url}/_graphql/schema"
-                    response = await client.get(schema_url)
-
-                    if response.status_code == 200:
-                        schema_data = response.json()
-                        sdl = schema_data.get('sdl', '')
-                        self.schemas[service_name] = sdl
-
-                        # Parse schema to build type ownership map
-                        self._parse_schema_types(service_name, sdl)
+            self.schemas[service_name] = sdl
+            try:
+                # Parse schema to build type ownership map
+                self._parse_schema_types(service_name, sdl)
+            except Exception as e:
+                logger.error(f"Error parsing schema from {service_name}: {e}")
+                continue
 
-                        logger.info(f"Fetched schema from {service_name}")
-                    else:
-                        logger.warning(f"Failed to fetch schema from {service_name}: {response.status_code}")
+            logger.info(f"Fetched schema from {service_name}")
 
-                except Exception as e:
-                    logger.error(f"Error fetching schema from {service_name}: {e}")
+        self._entity_type_set = frozenset(self.type_to_service)
+        self._build_field_stub_map()
 
         logger.info(f"Loaded {len(self.schemas)} subgraph schemas")
         logger.info(f"Type ownership map: {self.type_to_service}")
@@ -104,78 +420,62 @@ class FederationComposer:
             return
 
         try:
-            # Simple SDL parsing to find type definitions
-            lines = sdl.split('\n')
-            inside_query = False
-            inside_type = None
-
-            for line in lines:
-                line = line.strip()
-
-                # Look for type definitions (owned types)
-                if line.startswith('type ') and '@key' in line:
-                    # Extract type name: "type User @key(fields: "id") {"
-                    parts = line.split()
-                    if len(parts) >= 2:
-                        type_name = parts[1]
-                        # Check if this is an extension
-                        if 'extend' not in line:
-                            self.type_to_service[type_name] = service_name
-                        else:
-                            # This service extends this type
-                            if type_name not in self.type_extensions:
-                                self.type_extensions[type_name] = []
-                            self.type_extensions[type_name].append(service_name)
-                        inside_type = type_name
-                        continue
-
-                # Parse fields within type definitions
-                if inside_type and ':' in line and not line.startswith('#') and not line.startswith('}'):
-                    # Extract field and type from lines like: "author: User!" or "posts: [Post!]!"
-                    parts = line.split(':')
-                    if len(parts) >= 2:
-                        field_name = parts[0].strip()
-                        type_part = parts[1].strip()
-                        # Extract type name from "User!", "[Post!]!", etc.
-                        # Remove !, [, ], whitespace
-                        return_type = type_part.replace('!', '').replace('[', '').replace(']', '').strip()
-                        if return_type and return_type not in ['ID', 'String', 'Int', 'Float', 'Boolean']:
-                            self.field_to_return_type[field_name] = return_type
-                            logger.debug(f"Mapped field '{field_name}' to type '{return_type}'")
-
-                # End of type definition
-                if inside_type and line.startswith('}'):
-                    inside_type = None
-                    continue
+            document = parse(sdl, no_location=True)
+        except GraphQLError as e:
+            logger.warning(f"Error parsing schema for {service_name}: {e}")
+            return
 
-                # Parse Query type fields
-                if line.startswith('type Query'):
-                    inside_query = True
-                    continue
+        # Names are interned so every routing map shares one object per name,
+        # and owner-vs-target comparisons mostly short-circuit on identity
+        intern = sys.intern
+        service_name = intern(service_name)
 
-                if inside_query:
-                    # Check for closing brace
-                    if line.startswith('}'):
-                        inside_query = False
-                        continue
+        for definition in document.definitions:
+            if not isinstance(definition, (ObjectTypeDefinitionNode, ObjectTypeExtensionNode)):
+                continue
 
-                    # Extract field name from lines like: "users: [User!]!" or "user(id: ID!): User"
-                    if ':' in line and not line.startswith('#'):
-                        # Get the field name (before the colon)
-                        field_name = line.split(':')[0].strip()
-                        # Remove any arguments like "user(id: ID!)" -> "user"
-                        if '(' in field_name:
-                            field_name = field_name.split('(')[0].strip()
+            type_name = intern(definition.name.value)
+            is_extension = isinstance(definition, ObjectTypeExtensionNode)
+
+            if type_name == 'Query':
+                # Root fields this service provides, e.g. "users", "user(id: ID!)"
+                for field in definition.fields or ():
+                    self.query_field_to_service[intern(field.name.value)] = service_name
+                    logger.debug("Mapped query field '%s' to %s", field.name.value, service_name)
+            elif any(d.name.value == 'key' for d in definition.directives or ()):
+                # Entity type: owned here, or extended from its owning service
+                if not is_extension:
+                    self.type_to_service[type_name] = service_name
+                else:
+                    extenders = self.type_extensions.setdefault(type_name, [])
+                    if service_name not in extenders:
+                        extenders.append(service_name)
 
-                        if field_name:
-                            self.query_field_to_service[field_name] = service_name
-                            logger.debug(f"Mapped query field '{field_name}' to {service_name}")
+            # Map fields to their named return type ("author: User!" -> "User")
+            for field in definition.fields or ():
+                return_type = _unwrap_named(field.type)
+                if return_type not in SCALAR_NAMES:
+                    self.field_to_return_type[intern(field.name.value)] = intern(return_type)
 
-            # DEBUG: Confirm Query field parsing executed
-            logger.info(f"[FEDERATION FIX] Query field parsing completed for {service_name}")
+        logger.debug("Schema parsed for %s", service_name)
 
-        except Exception as e:
-            logger.warning(f"Error parsing schema for {service_name}: {e}")
+    def _build_field_stub_map(self):
+        """
+        Precompute, for every service, which known fields return an entity owned
+        elsewhere, so the per-request transform is a single dict lookup per field.
+        """
+        type_to_service = self.type_to_service
+        field_owners = {
+            field_name: type_to_service.get(type_name)
+            for field_name, type_name in self.field_to_return_type.items()
+        }
+        self._field_stub_map = {
+            service_name: {
+                field_name: owner is not None and owner != service_name
+                for field_name, owner in field_owners.items()
+            }
+            for service_name in map(sys.intern, self.service_urls)
+        }
 
     async def execute_federated_query(
         self,
@@ -198,116 +498,118 @@ class FederationComposer:
             GraphQL response dict with data/errors
         """
         variables = variables or {}
-        start_time = time.time()
+        # Phase boundaries as monotonic ns stamps; converted to ms only for logs
+        t_start = time.perf_counter_ns()
+        # Checked once: skips building messages and `extra` dicts when INFO is off
+        log_info = logger.isEnabledFor(logging.INFO)
 
         # Log query start
-        logger.info(f"[{run_id}] Federation query started", extra={
-            'event': 'federation_query_started',
-            'run_id': run_id,
-            'query_preview': query[:200] if len(query) > 200 else query,
-            'has_variables': bool(variables)
-        })
+        if log_info:
+            logger.info("[%s] Federation query started", run_id, extra={
+                'event': 'federation_query_started',
+                'run_id': run_id,
+                'query_preview': query[:200] if len(query) > 200 else query,
+                'has_variables': bool(variables)
+            })
 
         try:
-            # Parse the query to understand what's being requested
-            parse_start = time.time()
-            document = parse(query)
-            parse_time = (time.time() - parse_start) * 1000
+            # Parse and analyze the query, or reuse the plan for the same text
+            plan, plan_cached = self._get_plan(query)
+            t_planned = time.perf_counter_ns()
 
-            # Extract fields being queried
-            queried_fields = self._extract_queried_fields(document)
-
-            # Determine which services to query based on fields
-            services_to_query = self._determine_services_for_query(queried_fields)
+            document = plan.document
+            queried_fields = plan.queried_fields
+            services_to_query = plan.services
 
             # Log query analysis
-            logger.info(f"[{run_id}] Query analyzed", extra={
-                'event': 'query_analysis',
-                'run_id': run_id,
-                'queried_fields': list(queried_fields),
-                'target_services': services_to_query,
-                'parse_time_ms': round(parse_time, 2)
-            })
+            if log_info:
+                logger.info("[%s] Query analyzed", run_id, extra={
+                    'event': 'query_analysis',
+                    'run_id': run_id,
+                    'queried_fields': list(queried_fields),
+                    'target_services': list(services_to_query),
+                    'parse_time_ms': round((t_planned - t_start) / 1_000_000, 2),
+                    'plan_cached': plan_cached
+                })
 
             if not services_to_query:
                 # If we can't determine, try all services (failsafe)
                 services_to_query = list(self.service_urls.keys())
-                logger.warning(f"[{run_id}] Could not determine services, querying all: {services_to_query}")
+                logger.warning("[%s] Could not determine services, querying all: %s", run_id, services_to_query)
             else:
-                logger.info(f"[{run_id}] Routing query to services: {services_to_query}")
+                logger.info("[%s] Routing query to services: %s", run_id, services_to_query)
 
             # Check if we need entity resolution before executing
-            needs_entity_resolution = self._check_needs_entity_resolution(document, {})
-            logger.info(f"[{run_id}] Entity resolution check result: {needs_entity_resolution}")
+            needs_entity_resolution = plan.needs_entity_resolution
+            logger.info("[%s] Entity resolution check result: %s", run_id, needs_entity_resolution)
 
             # Transform query for each service if entity resolution is needed
+            t_exec = time.perf_counter_ns()
             if needs_entity_resolution:
-                logger.info(f"[{run_id}] Query requires entity resolution - transforming queries for each service")
+                logger.info("[%s] Query requires entity resolution - transforming queries for each service", run_id)
                 # Execute with transformed queries
-                exec_start = time.time()
                 results = await self._execute_with_transformed_queries(
                     services_to_query,
-                    document,
+                    plan,
                     variables,
                     run_id
                 )
-                exec_time = (time.time() - exec_start) * 1000
             else:
                 # Execute query as-is on relevant services
-                logger.info(f"[{run_id}] NO entity resolution needed - executing query as-is")
-                exec_start = time.time()
+                logger.info("[%s] NO entity resolution needed - executing query as-is", run_id)
                 results = await self._execute_on_services(
                     services_to_query,
                     query,
                     variables,
-                    run_id
+                    run_id,
+                    is_mutation=plan.is_mutation
                 )
-                exec_time = (time.time() - exec_start) * 1000
+            t_executed = time.perf_counter_ns()
 
-            # Check if we need to resolve entities (cross-service references)
-            needs_entity_resolution = self._check_needs_entity_resolution(document, results)
+            if plan.is_mutation:
+                # Subgraph data may have changed; don't serve entities fetched before
+                self._entity_cache.clear()
 
+            # Resolve cross-service entity references (decided once, in the plan)
             if needs_entity_resolution:
-                logger.info(f"[{run_id}] Query requires entity resolution across services")
-                resolve_start = time.time()
+                logger.info("[%s] Query requires entity resolution across services", run_id)
                 results = await self._resolve_entities(document, results, run_id)
-                resolve_time = (time.time() - resolve_start) * 1000
-            else:
-                resolve_time = 0
+            t_resolved = time.perf_counter_ns()
 
             # Merge results
-            merge_start = time.time()
             merged_data = self._merge_results(results)
-            merge_time = (time.time() - merge_start) * 1000
+            t_end = time.perf_counter_ns()
 
-            total_time = (time.time() - start_time) * 1000
+            total_time = (t_end - t_start) / 1_000_000
 
             # Log completion
-            logger.info(f"[{run_id}] Federation query completed", extra={
-                'event': 'federation_query_completed',
-                'run_id': run_id,
-                'total_time_ms': round(total_time, 2),
-                'execution_time_ms': round(exec_time, 2),
-                'resolve_time_ms': round(resolve_time, 2),
-                'merge_time_ms': round(merge_time, 2),
-                'services_called': len(results),
-                'success': 'errors' not in merged_data
-            })
-
-            # Record execution trace (async, fire-and-forget)
+            if log_info:
+                logger.info("[%s] Federation query completed", run_id, extra={
+                    'event': 'federation_query_completed',
+                    'run_id': run_id,
+                    'total_time_ms': round(total_time, 2),
+                    'execution_time_ms': round((t_executed - t_exec) / 1_000_000, 2),
+                    'resolve_time_ms': round((t_resolved - t_executed) / 1_000_000, 2),
+                    'merge_time_ms': round((t_end - t_resolved) / 1_000_000, 2),
+                    'services_called': len(results),
+                    'success': 'errors' not in merged_data
+                })
+
+            # Record execution trace (queued for a background worker)
             if self.run_storage_url and run_id:
-                asyncio.create_task(self._record_run(
+                self._enqueue_run(
                     run_id=run_id,
                     query=query,
                     variables=variables,
                     final_result=merged_data,
-                    total_duration_ms=total_time
-                ))
+                    total_duration_ms=total_time,
+                    timestamp_ns=time.time_ns()
+                )
 
             return merged_data
 
         except Exception as e:
-            total_time = (time.time() - start_time) * 1000
+            total_time = (time.perf_counter_ns() - t_start) / 1_000_000
             logger.error(f"[{run_id}] Error executing federated query: {e}", exc_info=True, extra={
                 'event': 'federation_query_error',
                 'run_id': run_id,
@@ -319,6 +621,37 @@ class FederationComposer:
                 "errors": [{"message": f"Federation error: {str(e)}"}]
             }
 
+    def _get_plan(self, query: str) -> Tuple[QueryPlan, bool]:
+        """
+        Return the QueryPlan for a query string, building it on a cache miss.
+
+        The second value is True when the plan came from the cache.
+        """
+        plan = self._plan_cache.get(query)
+        if plan is not None:
+            self._plan_cache.move_to_end(query)
+            return plan, True
+
+        document = parse(query)
+        queried_fields = self._extract_queried_fields(document)
+        plan = QueryPlan(
+            query=query,
+            document=document,
+            queried_fields=queried_fields,
+            services=tuple(self._determine_services_for_query(queried_fields)),
+            needs_entity_resolution=self._check_needs_entity_resolution(document),
+            is_mutation=any(
+                isinstance(d, OperationDefinitionNode) and d.operation == OperationType.MUTATION
+                for d in document.definitions
+            )
+        )
+
+        self._plan_cache[query] = plan
+        if len(self._plan_cache) > self._plan_cache_max:
+            self._plan_cache.popitem(last=False)
+
+        return plan, False
+
     def _extract_queried_fields(self, document: DocumentNode) -> Set[str]:
         """
         Extract all root-level fields being queried.
@@ -327,12 +660,13 @@ class FederationComposer:
         this returns {"users", "posts"}
         """
         fields = set()
+        _FN = FieldNode
 
         for definition in document.definitions:
             if isinstance(definition, OperationDefinitionNode):
                 if definition.selection_set:
                     for selection in definition.selection_set.selections:
-                        if isinstance(selection, FieldNode):
+                        if isinstance(selection, _FN):
                             fields.add(selection.name.value)
 
         return fields
@@ -349,7 +683,7 @@ class FederationComposer:
             # First, check if we have a direct mapping for this query field
             if field_name in self.query_field_to_service:
                 services.add(self.query_field_to_service[field_name])
-                logger.debug(f"Direct field mapping: {field_name} -> {self.query_field_to_service[field_name]}")
+                logger.debug("Direct field mapping: %s -> %s", field_name, self.query_field_to_service[field_name])
                 continue
 
             # Fallback: Convert field name to potential type name
@@ -359,16 +693,18 @@ class FederationComposer:
             # Find which service owns this type
             if type_name in self.type_to_service:
                 services.add(self.type_to_service[type_name])
-                logger.debug(f"Type mapping: {field_name} ({type_name}) -> {self.type_to_service[type_name]}")
+                logger.debug("Type mapping: %s (%s) -> %s", field_name, type_name, self.type_to_service[type_name])
 
             # Check if any services extend this type
             if type_name in self.type_extensions:
                 services.update(self.type_extensions[type_name])
-                logger.debug(f"Type extensions for {type_name}: {self.type_extensions[type_name]}")
+                logger.debug("Type extensions for %s: %s", type_name, self.type_extensions[type_name])
 
         return list(services)
 
-    def _field_to_type_name(self, field_name: str) -> str:
+    @staticmethod
+    @functools.lru_cache(maxsize=1024)
+    def _field_to_type_name(field_name: str) -> str:
         """
         Convert field name to type name.
 
@@ -382,11 +718,7 @@ class FederationComposer:
             return field_name[:-1].capitalize()
         return field_name.capitalize()
 
-    def _check_needs_entity_resolution(
-        self,
-        document: DocumentNode,
-        results: Dict[str, Any]
-    ) -> bool:
+    def _check_needs_entity_resolution(self, document: DocumentNode) -> bool:
         """
         Check if query includes fields that require entity resolution.
 
@@ -410,35 +742,36 @@ class FederationComposer:
 
     def _has_nested_entity_selections(self, selection_set: SelectionSetNode) -> bool:
         """
-        Recursively check if selection set has entity references with non-id fields.
+        Check if selection set has entity references with non-id fields, at any depth.
 
         This checks if there are entity type fields (like "author", "user") that
         have selections beyond just "id", indicating cross-service resolution is needed.
         """
-        for selection in selection_set.selections:
-            if isinstance(selection, FieldNode):
-                if selection.selection_set:
-                    field_name = selection.name.value
-
-                    # Get the actual return type from our schema mapping
-                    type_name = self.field_to_return_type.get(field_name)
-                    if not type_name:
-                        # Fallback to heuristic
-                        type_name = self._field_to_type_name(field_name)
-
-                    # Check if this field references an entity type
-                    if type_name in self.type_to_service:
-                        # This is an entity reference - check if it has nested selections beyond 'id'
-                        has_non_id_fields = any(
-                            isinstance(s, FieldNode) and s.name.value not in ['id', '__typename']
-                            for s in selection.selection_set.selections
-                        )
-                        if has_non_id_fields:
-                            return True
+        # Bound locally: this walk runs for every uncached query
+        _FN = FieldNode
+        _ret = self.field_to_return_type.get
+        _f2t = self._field_to_type_name
+        _types = self._entity_type_set
+
+        stack = list(selection_set.selections)
+        while stack:
+            selection = stack.pop()
+            if not isinstance(selection, _FN) or not selection.selection_set:
+                continue
+
+            field_name = selection.name.value
+            # Get the actual return type from our schema mapping (fallback to heuristic)
+            type_name = _ret(field_name) or _f2t(field_name)
+            sub_selections = selection.selection_set.selections
 
-                    # Recursively check nested selections
-                    if self._has_nested_entity_selections(selection.selection_set):
+            # Entity reference with selections beyond 'id' needs resolving
+            if type_name in _types:
+                for s in sub_selections:
+                    if isinstance(s, _FN) and s.name.value not in ('id', '__typename'):
                         return True
+
+            # Check nested selections
+            stack.extend(sub_selections)
         return False
 
     async def _resolve_entities(
@@ -487,39 +820,32 @@ class FederationComposer:
         Example: {"User": [{"__typename": "User", "id": "1"}, ...]}
         """
         entity_refs = {}
+        field_types = self.field_to_return_type
+
+        # Iterative depth-first walk over (value, parent_type); children are
+        # pushed in reverse so references come out in document order
+        stack = [(result["data"], None) for result in results.values() if result.get("data")]
+        stack.reverse()
 
-        def extract_from_value(value: Any, parent_type: Optional[str] = None):
-            """Recursively extract entity references from nested data"""
+        while stack:
+            value, parent_type = stack.pop()
             if isinstance(value, dict):
                 # Check if this looks like an entity reference
                 if "id" in value and len(value) <= 2:  # Entity stub (just id, maybe typename)
-                    # Try to determine the type
-                    type_name = parent_type
-                    if type_name and type_name in self.type_to_service:
-                        if type_name not in entity_refs:
-                            entity_refs[type_name] = []
-                        entity_refs[type_name].append({
-                            "__typename": type_name,
+                    if parent_type and parent_type in self.type_to_service:
+                        entity_refs.setdefault(parent_type, []).append({
+                            "__typename": parent_type,
                             "id": value["id"]
                         })
                 else:
-                    # Recursively search nested objects
-                    for key, nested_value in value.items():
-                        # Try to get actual type from schema mapping, fallback to inference
-                        inferred_type = None
-                        if isinstance(nested_value, (dict, list)):
-                            inferred_type = self.field_to_return_type.get(key)
-                            if not inferred_type:
-                                inferred_type = self._field_to_type_name(key)
-                        extract_from_value(nested_value, inferred_type)
+                    # Search nested objects, typed from the schema mapping or by inference
+                    stack.extend(reversed([
+                        (nested_value, field_types.get(key) or self._field_to_type_name(key))
+                        for key, nested_value in value.items()
+                        if isinstance(nested_value, (dict, list))
+                    ]))
             elif isinstance(value, list):
-                for item in value:
-                    extract_from_value(item, parent_type)
-
-        # Extract from all service results
-        for service_name, result in results.items():
-            if "data" in result and result["data"]:
-                extract_from_value(result["data"])
+                stack.extend((item, parent_type) for item in reversed(value))
 
         return entity_refs
 
@@ -535,55 +861,124 @@ class FederationComposer:
         For each type, calls the owning service's _entities query.
         """
         resolved = {}
+        lookups = []
 
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            for type_name, refs in entity_refs.items():
-                # Find which service owns this type
-                if type_name not in self.type_to_service:
-                    logger.warning(f"No service found for type {type_name}")
-                    continue
+        for type_name, refs in entity_refs.items():
+            # Find which service owns this type
+            if type_name not in self.type_to_service:
+                logger.warning(f"No service found for type {type_name}")
+                continue
 
-                service_name = self.type_to_service[type_name]
-                service_url = self.service_urls.get(service_name)
+            service_name = self.type_to_service[type_name]
+            service_url = self.service_urls.get(service_name)
 
-                if not service_url:
-                    logger.warning(f"No URL found for service {service_name}")
-                    continue
+            if not service_url:
+                logger.warning(f"No URL found for service {service_name}")
+                continue
 
-                # Extract the fields requested for this type from the document
-                requested_fields = self._extract_requested_fields_for_type(document, type_name)
-
-                # Build _entities query
-                entities_query = self._build_entities_query(type_name, requested_fields)
-
-                try:
-                    graphql_url = f"{service_url}/graphql"
-                    headers = {'Content-Type': 'application/json'}
-                    if run_id:
-                        headers['X-Run-ID'] = run_id
-
-                    response = await client.post(
-                        graphql_url,
-                        json={
-                            "query": entities_query,
-                            "variables": {"representations": refs}
-                        },
-                        headers=headers
-                    )
+            # Extract the fields requested for this type from the document
+            requested_fields = self._extract_requested_fields_for_type(document, type_name)
+            key = (service_url, type_name, tuple(sorted(requested_fields)))
+            lookups.append((type_name, self._load_entities(key, refs, run_id)))
 
-                    if response.status_code == 200:
-                        result = response.json()
-                        if "data" in result and "_entities" in result["data"]:
-                            resolved[type_name] = result["data"]["_entities"]
-                            logger.info(f"Resolved {len(result['data']['_entities'])} {type_name} entities")
-                    else:
-                        logger.warning(f"Entity resolution failed for {type_name}: {response.status_code}")
+        # Resolve all types at once; this request's lookups on the same
+        # service are coalesced into one POST
+        results = await _gather_settled([load for _, load in lookups])
 
-                except Exception as e:
-                    logger.error(f"Error fetching entities for {type_name}: {e}")
+        for (type_name, _), entities in zip(lookups, results):
+            if isinstance(entities, Exception):
+                logger.error(f"Error fetching entities for {type_name}: {entities}")
+            elif entities is not None:
+                resolved[type_name] = [e for e in entities if e is not None]
+                logger.info("Resolved %d %s entities", len(resolved[type_name]), type_name)
 
         return resolved
 
+    async def _load_entities(
+        self,
+        key: Tuple[str, str, Tuple[str, ...]],
+        refs: List[Dict[str, Any]],
+        run_id: Optional[str]
+    ) -> Optional[List[Any]]:
+        """
+        Resolve refs for a (service_url, type_name, fields) key.
+
+        Fresh entries from the entity cache are used directly; only the
+        remaining (de-duplicated) ids go through the batcher.
+        """
+        if not self._entity_cache_enabled:
+            return await self._entity_batcher.load(key[0], key[1:], refs, run_id)
+
+        now = time.monotonic()
+        cached = []
+        misses = {}
+        for ref in refs:
+            hit = self._entity_cache.get(key + (ref["id"],))
+            if hit is not None and now - hit[0] < self._entity_cache_ttl:
+                cached.append(hit[1])
+            else:
+                misses.setdefault(ref["id"], ref)
+
+        if not misses:
+            return cached
+
+        fetched = await self._entity_batcher.load(key[0], key[1:], list(misses.values()), run_id)
+        if fetched is None:
+            return cached or None
+
+        now = time.monotonic()
+        for entity in fetched:
+            if entity is not None and "id" in entity:
+                self._entity_cache[key + (entity["id"],)] = (now, entity)
+        self._trim_entity_cache(now)
+
+        return cached + fetched
+
+    def _trim_entity_cache(self, now: float):
+        """Keep the entity cache under its size bound: expired entries first, then oldest"""
+        if len(self._entity_cache) <= self._entity_cache_max:
+            return
+
+        ttl = self._entity_cache_ttl
+        self._entity_cache = {k: v for k, v in self._entity_cache.items() if now - v[0] < ttl}
+        while len(self._entity_cache) > self._entity_cache_max:
+            del self._entity_cache[next(iter(self._entity_cache))]
+
+    async def _post_entities(
+        self,
+        service_url: str,
+        groups: List[Tuple[EntityGroup, List[Dict[str, Any]]]],
+        run_id: Optional[str]
+    ) -> List[Optional[List[Any]]]:
+        """
+        Resolve every queued entity group on one subgraph with a single POST.
+
+        Returns one list per group, in representation order, or None for a
+        group the response has no entities for.
+        """
+        # Build _entities query: one aliased selection per group
+        entities_query = self._build_entities_query(tuple(group for group, _ in groups))
+
+        headers = {'Content-Type': 'application/json'}
+        if run_id:
+            headers['X-Run-ID'] = run_id
+
+        response = await self._get_client().post(
+            f"{service_url}/graphql",
+            content=orjson.dumps({
+                "query": entities_query,
+                "variables": {f"r{i}": reps for i, (_, reps) in enumerate(groups)}
+            }),
+            headers=headers
+        )
+
+        if response.status_code != 200:
+            type_names = ", ".join(group[0] for group, _ in groups)
+            raise RuntimeError(f"Entity resolution failed for {type_names}: {response.status_code}")
+
+        data = (await _loads_response(response.content)).get("data") or {}
+        return [data.get(f"e{i}") for i in range(len(groups))]
+
     def _extract_requested_fields_for_type(
         self,
         document: DocumentNode,
@@ -596,65 +991,50 @@ class FederationComposer:
         this returns ["name", "email"]
         """
         fields = set()
+        _FN = FieldNode
+        _ret = self.field_to_return_type.get
+        _f2t = self._field_to_type_name
+
+        stack = [
+            definition.selection_set
+            for definition in document.definitions
+            if isinstance(definition, OperationDefinitionNode) and definition.selection_set
+        ]
+        while stack:
+            for selection in stack.pop().selections:
+                if not isinstance(selection, _FN) or not selection.selection_set:
+                    continue
 
-        def visit_selections(selection_set: SelectionSetNode, current_type: Optional[str] = None):
-            for selection in selection_set.selections:
-                if isinstance(selection, FieldNode):
-                    field_name = selection.name.value
-                    # Get actual type from schema mapping, fallback to heuristic inference
-                    inferred_type = self.field_to_return_type.get(field_name)
-                    if not inferred_type:
-                        inferred_type = self._field_to_type_name(field_name)
-
-                    if inferred_type == type_name and selection.selection_set:
-                        # This field returns the target type - collect its sub-fields
-                        for sub_selection in selection.selection_set.selections:
-                            if isinstance(sub_selection, FieldNode):
-                                fields.add(sub_selection.name.value)
-
-                    if selection.selection_set:
-                        visit_selections(selection.selection_set, inferred_type)
+                field_name = selection.name.value
+                # Get actual type from schema mapping, fallback to heuristic inference
+                if (_ret(field_name) or _f2t(field_name)) == type_name:
+                    # This field returns the target type - collect its sub-fields
+                    for sub_selection in selection.selection_set.selections:
+                        if isinstance(sub_selection, _FN):
+                            fields.add(sub_selection.name.value)
 
-        for definition in document.definitions:
-            if isinstance(definition, OperationDefinitionNode):
-                if definition.selection_set:
-                    visit_selections(definition.selection_set)
+                stack.append(selection.selection_set)
 
         # Always include 'id' as it's the key field
         fields.add('id')
 
         return list(fields)
 
-    def _build_entities_query(
-        self,
-        type_name: str,
-        fields: List[str]
-    ) -> str:
+    @staticmethod
+    @functools.lru_cache(maxsize=512)
+    def _build_entities_query(groups: Tuple[EntityGroup, ...]) -> str:
         """
-        Build a _entities query to resolve entities.
-
-        Example output:
-        query($representations: [_Any!]!) {
-          _entities(representations: $representations) {
-            ... on User {
-              id
-              name
-              email
-            }
-          }
-        }
-        """
-        fields_str = "\n              ".join(fields)
-        query = f"""
-        query($representations: [_Any!]!) {{
-          _entities(representations: $representations) {{
-            ... on {type_name} {{
-              {fields_str}
-            }}
-          }}
-        }}
+        Build a _entities query resolving one or more (type, fields) groups.
+
+        Cached per tuple of groups. Example output for two groups:
+        query($r0: [_Any!]!, $r1: [_Any!]!) { e0: _entities(representations: $r0) { ... on User { id name } } e1: _entities(representations: $r1) { ... on Post { id title } } }
         """
-        return query
+        params = ", ".join(f"$r{i}: [_Any!]!" for i in range(len(groups)))
+        selections = " ".join(
+            f"e{i}: _entities(representations: $r{i}) {{ ... on {type_name} {{ {' '.join(fields)} }} }}"
+            for i, (type_name, fields) in enumerate(groups)
+        )
+        return f"query({params}) {{ {selections} }}"
 
     def _merge_entities(
         self,
@@ -666,35 +1046,50 @@ class FederationComposer:
 
         This replaces entity stubs (objects with just 'id') with full entities.
         """
-        def merge_into_value(value: Any, type_name: Optional[str] = None) -> Any:
-            """Recursively merge entities into nested data structures"""
-            if isinstance(value, dict):
-                # Check if this is an entity stub that needs to be replaced
-                if "id" in value and len(value) <= 2 and type_name:
-                    # Find the resolved entity
-                    if type_name in resolved_entities:
-                        entity_id = value["id"]
-                        for resolved_entity in resolved_entities[type_name]:
-                            if resolved_entity.get("id") == entity_id:
-                                # Replace stub with full entity
-                                return resolved_entity
-                    return value  # No resolution found, keep stub
+        field_types = self.field_to_return_type
+
+        # {type_name: {id: entity}} so each stub is an O(1) lookup; first match wins
+        entity_index: Dict[str, Dict[Any, Dict[str, Any]]] = {}
+        for type_name, entities in resolved_entities.items():
+            by_id = entity_index[type_name] = {}
+            for entity in entities:
+                if "id" in entity:
+                    by_id.setdefault(entity["id"], entity)
+
+        def merge_into_value(root: Any) -> Any:
+            """Copy a result tree with entity stubs replaced, without recursion"""
+            holder = [None]
+            # (source value, its type, container to write into, key/index in it)
+            stack = [(root, None, holder, 0)]
+
+            while stack:
+                value, type_name, parent, slot = stack.pop()
+                if isinstance(value, dict):
+                    # Check if this is an entity stub that needs to be replaced
+                    if "id" in value and len(value) <= 2 and type_name:
+                        entity = entity_index.get(type_name, {}).get(value["id"])
+                        # No resolution found, keep stub
+                        parent[slot] = entity if entity is not None else value
+                    else:
+                        result = parent[slot] = {}
+                        for key, nested_value in value.items():
+                            if isinstance(nested_value, (dict, list)):
+                                result[key] = None  # Filled in when popped; keeps key order
+                                stack.append((
+                                    nested_value,
+                                    field_types.get(key) or self._field_to_type_name(key),
+                                    result,
+                                    key
+                                ))
+                            else:
+                                result[key] = nested_value
+                elif isinstance(value, list):
+                    result = parent[slot] = [None] * len(value)
+                    stack.extend((item, type_name, result, i) for i, item in enumerate(value))
                 else:
-                    # Recursively process nested objects
-                    result = {}
-                    for key, nested_value in value.items():
-                        # Get actual type from schema mapping, fallback to heuristic
-                        inferred_type = None
-                        if isinstance(nested_value, (dict, list)):
-                            inferred_type = self.field_to_return_type.get(key)
-                            if not inferred_type:
-                                inferred_type = self._field_to_type_name(key)
-                        result[key] = merge_into_value(nested_value, inferred_type)
-                    return result
-            elif isinstance(value, list):
-                return [merge_into_value(item, type_name) for item in value]
-            else:
-                return value
+                    parent[slot] = value
+
+            return holder[0]
 
         # Merge entities into all service results
         merged_results = {}
@@ -712,7 +1107,7 @@ class FederationComposer:
     async def _execute_with_transformed_queries(
         self,
         service_names: List[str],
-        document: DocumentNode,
+        plan: QueryPlan,
         variables: Dict[str, Any],
         run_id: Optional[str]
     ) -> Dict[str, Any]:
@@ -722,49 +1117,57 @@ class FederationComposer:
         For example, if querying posts-service with `author { name email }`,
         this transforms it to `author { id }` since posts-service only knows about User.id
         """
-        results = {}
+        client = self._get_client()
+        targets = [name for name in service_names if name in self.service_urls]
 
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            for service_name in service_names:
-                if service_name not in self.service_urls:
-                    continue
+        async def call_one(service_name: str, transformed_query: str) -> Dict[str, Any]:
+            graphql_url = f"{self.service_urls[service_name]}/graphql"
 
-                # Transform query for this specific service
-                transformed_doc = self._transform_query_for_service(document, service_name)
-                transformed_query = print_ast(transformed_doc)
+            try:
+                headers = {'Content-Type': 'application/json'}
+                if run_id:
+                    headers['X-Run-ID'] = run_id
 
-                service_url = self.service_urls[service_name]
-                graphql_url = f"{service_url}/graphql"
+                logger.debug("Sending transformed query to %s:\n%s", service_name, transformed_query)
 
-                try:
-                    headers = {'Content-Type': 'application/json'}
-                    if run_id:
-                        headers['X-Run-ID'] = run_id
+                response = await client.post(
+                    graphql_url,
+                    content=orjson.dumps({"query": transformed_query, "variables": variables}),
+                    headers=headers
+                )
 
-                    logger.debug(f"Sending transformed query to {service_name}:\n{transformed_query}")
+                if response.status_code == 200:
+                    logger.debug("Got response from %s", service_name)
+                    return await _loads_response(response.content)
 
-                    response = await client.post(
-                        graphql_url,
-                        json={"query": transformed_query, "variables": variables},
-                        headers=headers
-                    )
+                logger.warning(f"Service {service_name} returned {response.status_code}")
+                return {
+                    "errors": [{"message": f"Service {service_name} error: {response.status_code}"}]
+                }
 
-                    if response.status_code == 200:
-                        results[service_name] = response.json()
-                        logger.debug(f"Got response from {service_name}")
-                    else:
-                        logger.warning(f"Service {service_name} returned {response.status_code}")
-                        results[service_name] = {
-                            "errors": [{"message": f"Service {service_name} error: {response.status_code}"}]
-                        }
-
-                except Exception as e:
-                    logger.error(f"Error calling {service_name}: {e}")
-                    results[service_name] = {
-                        "errors": [{"message": f"Service {service_name} error: {str(e)}"}]
-                    }
+            except Exception as e:
+                logger.error(f"Error calling {service_name}: {e}")
+                return {
+                    "errors": [{"message": f"Service {service_name} error: {str(e)}"}]
+                }
+
+        calls = []
+        for service_name in targets:
+            # Transform query for this specific service, once per plan
+            transformed_query = plan.transformed_per_service.get(service_name)
+            if transformed_query is None:
+                transformed_doc = self._transform_query_for_service(plan.document, service_name)
+                # An untouched document comes back as is; send the client's text unprinted
+                if transformed_doc is plan.document:
+                    transformed_query = plan.query
+                else:
+                    transformed_query = print_ast(transformed_doc)
+                plan.transformed_per_service[service_name] = transformed_query
+            calls.append(call_one(service_name, transformed_query))
 
-        return results
+        responses = await _run_service_calls(calls, plan.is_mutation)
+        # Keep service order: later services override earlier ones when merging
+        return dict(zip(targets, responses))
 
     def _transform_query_for_service(
         self,
@@ -776,82 +1179,91 @@ class FederationComposer:
 
         For entity references (e.g., User in posts-service), strip fields down to just `id`.
         """
-        from graphql.language import NameNode
-        from copy import deepcopy
-
-        def transform_selection_set(selection_set: SelectionSetNode) -> SelectionSetNode:
-            """Recursively transform selection sets"""
-            new_selections = []
-
-            for selection in selection_set.selections:
-                if isinstance(selection, FieldNode):
-                    new_field = transform_field_node(selection)
-                    new_selections.append(new_field)
-                else:
-                    new_selections.append(selection)
-
-            return SelectionSetNode(selections=new_selections)
-
-        def transform_field_node(node: FieldNode) -> FieldNode:
-            """Transform a field node"""
-            if not node.selection_set:
-                return node
+        stub_map = self._field_stub_map.get(service_name, {})
+        id_only = self._id_only_selection_set
+
+        def is_stubbed(field_name: str) -> bool:
+            stub = stub_map.get(field_name)
+            if stub is None:
+                # Field isn't in any schema; guess its type from the name
+                entity_service = self.type_to_service.get(self._field_to_type_name(field_name))
+                stub = entity_service is not None and entity_service != service_name
+            return stub
+
+        def transform_selection_set(root: SelectionSetNode) -> SelectionSetNode:
+            """
+            Rebuild a selection set with foreign entity fields stubbed to `{ id }`.
+
+            Walks with an explicit stack of [selection_set, next index, rebuilt
+            selections, changed] frames instead of recursing, so deep queries
+            can't hit the recursion limit. A selection set is only rebuilt when
+            something under it changed; otherwise the original node is shared.
+            """
+            stack = [[root, 0, [], False]]
+            while True:
+                frame = stack[-1]
+                selection_set, index, new_selections, changed = frame
+                selections = selection_set.selections
+
+                if index < len(selections):
+                    node = selections[index]
+                    if isinstance(node, FieldNode) and node.selection_set:
+                        if not is_stubbed(node.name.value):
+                            # Descend; this frame resumes at `index` once the child is done
+                            stack.append([node.selection_set, 0, [], False])
+                            continue
+                        # Return field with only id selection
+                        node = FieldNode(
+                            name=node.name,
+                            alias=node.alias,
+                            arguments=node.arguments,
+                            directives=node.directives,
+                            selection_set=id_only
+                        )
+                        frame[3] = True
+                    new_selections.append(node)
+                    frame[1] = index + 1
+                    continue
 
-            field_name = node.name.value
-            # Get actual type from our schema mapping, fallback to heuristic
-            type_name = self.field_to_return_type.get(field_name)
-            if not type_name:
-                type_name = field_name[:-1].capitalize() if field_name.endswith('s') else field_name.capitalize()
+                # All selections handled: finish this set and hand it to the parent field
+                stack.pop()
+                result = SelectionSetNode(selections=new_selections) if changed else selection_set
+                if not stack:
+                    return result
 
-            # Check if this field references an entity owned by another service
-            if type_name in self.type_to_service:
-                entity_service = self.type_to_service[type_name]
-
-                # If this entity is NOT owned by the target service, stub it out
-                if entity_service != service_name:
-                    # Keep only the id field
-                    id_field = FieldNode(
-                        name=NameNode(value="id"),
-                        arguments=[],
-                        directives=[],
-                        alias=None,
-                        selection_set=None
-                    )
-                    # Return field with only id selection
-                    return FieldNode(
-                        name=node.name,
-                        alias=node.alias,
-                        arguments=node.arguments,
-                        directives=node.directives,
-                        selection_set=SelectionSetNode(selections=[id_field])
+                parent = stack[-1]
+                field_node = parent[0].selections[parent[1]]
+                if result is not field_node.selection_set:
+                    field_node = FieldNode(
+                        name=field_node.name,
+                        alias=field_node.alias,
+                        arguments=field_node.arguments,
+                        directives=field_node.directives,
+                        selection_set=result
                     )
-
-            # Otherwise, recursively transform nested selections
-            new_selection_set = transform_selection_set(node.selection_set)
-            return FieldNode(
-                name=node.name,
-                alias=node.alias,
-                arguments=node.arguments,
-                directives=node.directives,
-                selection_set=new_selection_set
-            )
+                    parent[3] = True
+                parent[2].append(field_node)
+                parent[1] += 1
 
         # Transform all definitions in the document
         new_definitions = []
+        changed = False
         for definition in document.definitions:
             if isinstance(definition, OperationDefinitionNode) and definition.selection_set:
                 new_selection_set = transform_selection_set(definition.selection_set)
-                new_def = OperationDefinitionNode(
-                    operation=definition.operation,
-                    name=definition.name,
-                    variable_definitions=definition.variable_definitions,
-                    directives=definition.directives,
-                    selection_set=new_selection_set
-                )
-                new_definitions.append(new_def)
-            else:
-                new_definitions.append(definition)
+                if new_selection_set is not definition.selection_set:
+                    changed = True
+                    definition = OperationDefinitionNode(
+                        operation=definition.operation,
+                        name=definition.name,
+                        variable_definitions=definition.variable_definitions,
+                        directives=definition.directives,
+                        selection_set=new_selection_set
+                    )
+            new_definitions.append(definition)
 
+        if not changed:
+            return document
         return DocumentNode(definitions=new_definitions)
 
     async def _execute_on_services(
@@ -859,112 +1271,84 @@ class FederationComposer:
         service_names: List[str],
         query: str,
         variables: Dict[str, Any],
-        run_id: Optional[str]
+        run_id: Optional[str],
+        is_mutation: bool = False
     ) -> Dict[str, Any]:
-        """Execute query on specified services in parallel"""
-        results = {}
-
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            tasks = []
-
-            for service_name in service_names:
-                if service_name not in self.service_urls:
-                    continue
-
-                service_url = self.service_urls[service_name]
-                graphql_url = f"{service_url}/graphql"
-
-                try:
-                    headers = {'Content-Type': 'application/json'}
-                    if run_id:
-                        headers['X-Run-ID'] = run_id
-
-                    # Log service call start
-                    call_start = time.time()
-                    logger.info(f"[{run_id}] → Calling {service_name}", extra={
+        """Execute query on specified services (in parallel, unless it's a mutation)"""
+        log_info = logger.isEnabledFor(logging.INFO)
+
+        client = self._get_client()
+        targets = [name for name in service_names if name in self.service_urls]
+
+        # Every service gets the same request, so encode it once
+        body = orjson.dumps({"query": query, "variables": variables})
+        headers = {'Content-Type': 'application/json'}
+        if run_id:
+            headers['X-Run-ID'] = run_id
+
+        async def call_one(service_name: str) -> Dict[str, Any]:
+            graphql_url = f"{self.service_urls[service_name]}/graphql"
+
+            call_start = time.time()
+            try:
+                # Log service call start
+                if log_info:
+                    logger.info("[%s] → Calling %s", run_id, service_name, extra={
                         'event': 'service_call_start',
                         'run_id': run_id,
                         'service': service_name,
                         'url': graphql_url,
                         'query': query[:200] if len(query) > 200 else query,
-                        'variables': variables
+                        'has_variables': bool(variables)
                     })
 
-                    response = await client.post(
-                        graphql_url,
-                        json={"query": query, "variables": variables},
-                        headers=headers
-                    )
+                response = await client.post(graphql_url, content=body, headers=headers)
 
-                    call_duration = (time.time() - call_start) * 1000
-
-                    if response.status_code == 200:
-                        result_data = response.json()
-                        results[service_name] = result_data
-
-                        # Track service call for recording
-                        self._track_service_call(
-                            run_id=run_id,
-                            service_name=service_name,
-                            url=graphql_url,
-                            query=query,
-                            variables=variables,
-                            output_data=result_data,
-                            duration_ms=call_duration,
-                            status_code=200,
-                            has_errors='errors' in result_data,
-                            error_messages=[e.get('message', str(e)) for e in result_data.get('errors', [])] if 'errors' in result_data else None
-                        )
+                call_duration = (time.time() - call_start) * 1000
+
+                if response.status_code == 200:
+                    result_data = await _loads_response(response.content)
 
-                        # Log service call success with response
-                        logger.info(f"[{run_id}] ← Response from {service_name}", extra={
+                    # Track service call for recording
+                    self._track_service_call(
+                        run_id=run_id,
+                        service_name=service_name,
+                        url=graphql_url,
+                        query=query,
+                        variables=variables,
+                        output_data=result_data,
+                        duration_ms=call_duration,
+                        status_code=200,
+                        has_errors='errors' in result_data,
+                        error_messages=[e.get('message', str(e)) for e in result_data.get('errors', [])] if 'errors' in result_data else None
+                    )
+
+                    # Log service call success; sizes only, the body just at DEBUG
+                    if log_info:
+                        logger.info("[%s] ← Response from %s", run_id, service_name, extra={
                             'event': 'service_call_success',
                             'run_id': run_id,
                             'service': service_name,
                             'duration_ms': round(call_duration, 2),
-                            'response_data': result_data,
+                            'response_bytes': len(response.content),
                             'has_errors': 'errors' in result_data,
                             'data_keys': list(result_data.get('data', {}).keys()) if result_data.get('data') else []
                         })
-                    else:
-                        error_result = {
-                            "errors": [{"message": f"Service {service_name} error: {response.status_code}"}]
-                        }
-                        results[service_name] = error_result
-
-                        # Track failed service call
-                        self._track_service_call(
-                            run_id=run_id,
-                            service_name=service_name,
-                            url=graphql_url,
-                            query=query,
-                            variables=variables,
-                            output_data=error_result,
-                            duration_ms=call_duration,
-                            status_code=response.status_code,
-                            has_errors=True,
-                            error_messages=[f"HTTP {response.status_code}"]
-                        )
-
-                        logger.warning(f"[{run_id}] Service {service_name} returned {response.status_code}")
-
-                        logger.error(f"[{run_id}] ← Error from {service_name}", extra={
-                            'event': 'service_call_error',
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug("[%s] Response body from %s", run_id, service_name, extra={
+                            'event': 'service_call_response',
                             'run_id': run_id,
                             'service': service_name,
-                            'status_code': response.status_code,
-                            'duration_ms': round(call_duration, 2)
+                            'variables': variables,
+                            'response_data': result_data
                         })
-
-                except Exception as e:
-                    call_duration = (time.time() - call_start) * 1000 if 'call_start' in locals() else 0
-
+                    return result_data
+                else:
                     error_result = {
-                        "errors": [{"message": f"Service {service_name} error: {str(e)}"}]
+                        "errors": [{"message": f"Service {service_name} error: {response.status_code}"}]
                     }
-                    results[service_name] = error_result
 
-                    # Track exception
+                    # Track failed service call
                     self._track_service_call(
                         run_id=run_id,
                         service_name=service_name,
@@ -973,20 +1357,55 @@ class FederationComposer:
                         variables=variables,
                         output_data=error_result,
                         duration_ms=call_duration,
-                        status_code=0,
+                        status_code=response.status_code,
                         has_errors=True,
-                        error_messages=[str(e)]
+                        error_messages=[f"HTTP {response.status_code}"]
                     )
 
-                    logger.error(f"[{run_id}] Error calling {service_name}: {e}", extra={
-                        'event': 'service_call_exception',
+                    logger.warning(f"[{run_id}] Service {service_name} returned {response.status_code}")
+
+                    logger.error(f"[{run_id}] ← Error from {service_name}", extra={
+                        'event': 'service_call_error',
                         'run_id': run_id,
                         'service': service_name,
-                        'error': str(e),
+                        'status_code': response.status_code,
                         'duration_ms': round(call_duration, 2)
                     })
+                    return error_result
+
+            except Exception as e:
+                call_duration = (time.time() - call_start) * 1000
+
+                error_result = {
+                    "errors": [{"message": f"Service {service_name} error: {str(e)}"}]
+                }
+
+                # Track exception
+                self._track_service_call(
+                    run_id=run_id,
+                    service_name=service_name,
+                    url=graphql_url,
+                    query=query,
+                    variables=variables,
+                    output_data=error_result,
+                    duration_ms=call_duration,
+                    status_code=0,
+                    has_errors=True,
+                    error_messages=[str(e)]
+                )
 
-        return results
+                logger.error(f"[{run_id}] Error calling {service_name}: {e}", extra={
+                    'event': 'service_call_exception',
+                    'run_id': run_id,
+                    'service': service_name,
+                    'error': str(e),
+                    'duration_ms': round(call_duration, 2)
+                })
+                return error_result
+
+        responses = await _run_service_calls([call_one(name) for name in targets], is_mutation)
+        # Keep service order: later services override earlier ones when merging
+        return dict(zip(targets, responses))
 
     def _merge_results(self, results: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -997,24 +1416,23 @@ class FederationComposer:
         - Collecting errors from all services
         - Preserving null vs missing data
         """
-        merged = {"data": {}, "errors": []}
+        data: Dict[str, Any] = {}
+        errors: List[Any] = []
 
-        for service_name, result in results.items():
-            if "data" in result and result["data"]:
+        for result in results.values():
+            result_data = result.get("data")
+            if result_data:
                 # Merge data fields - later services override earlier ones for same keys
-                merged["data"].update(result["data"])
+                data.update(result_data)
 
-            if "errors" in result:
+            result_errors = result.get("errors")
+            if result_errors:
                 # Collect all errors
-                merged["errors"].extend(result["errors"])
-
-        # Clean up response
-        if not merged["errors"]:
-            del merged["errors"]
-
-        if not merged["data"]:
-            merged["data"] = None
+                errors.extend(result_errors)
 
+        merged = {"data": data or None}
+        if errors:
+            merged["errors"] = errors
         return merged
 
     def get_composed_schema_info(self) -> Dict[str, Any]:
@@ -1060,22 +1478,54 @@ class FederationComposer:
         if not run_id:
             return
 
-        if run_id not in self.run_service_calls:
-            self.run_service_calls[run_id] = []
-
-        self.run_service_calls[run_id].append({
-            "service_name": service_name,
-            "url": url,
-            "query": query,
-            "variables": variables,
-            "input_data": {"query": query, "variables": variables},
-            "output_data": output_data,
-            "duration_ms": round(duration_ms, 2),
-            "timestamp": datetime.utcnow().isoformat() + "Z",
-            "has_errors": has_errors,
-            "error_messages": error_messages,
-            "status_code": status_code
-        })
+        entry = self.run_service_calls.get(run_id)
+        if entry is None:
+            now = time.monotonic()
+            self._trim_run_service_calls(now)
+            entry = self.run_service_calls[run_id] = (now, [])
+
+        entry[1].append(ServiceCallRecord(
+            service_name, url, query, variables, output_data, duration_ms,
+            time.time_ns(), status_code, has_errors, error_messages
+        ))
+
+    def _trim_run_service_calls(self, now: float):
+        """Evict runs that were never recorded: expired ones, then oldest beyond the bound"""
+        calls = self.run_service_calls
+        cutoff = now - RUN_CALLS_TTL
+        # Insertion order is start order, so stale runs are always at the front
+        while calls:
+            oldest = next(iter(calls))
+            if calls[oldest][0] >= cutoff and len(calls) < RUN_CALLS_MAX:
+                break
+            del calls[oldest]
+
+    def _enqueue_run(self, **record):
+        """
+        Queue an execution trace for _record_run without blocking the request.
+
+        Workers start on first use. When the queue is full the trace is
+        dropped rather than spawning unbounded tasks.
+        """
+        if not self._run_workers:
+            self._run_workers = [
+                asyncio.create_task(self._run_worker()) for _ in range(RUN_RECORD_WORKERS)
+            ]
+
+        try:
+            self._run_queue.put_nowait(record)
+        except asyncio.QueueFull:
+            logger.warning(f"[{record['run_id']}] Run queue full, dropping trace")
+            self.run_service_calls.pop(record['run_id'], None)
+
+    async def _run_worker(self):
+        """Record queued execution traces one at a time"""
+        while True:
+            record = await self._run_queue.get()
+            try:
+                await self._record_run(**record)
+            finally:
+                self._run_queue.task_done()
 
     async def _record_run(
         self,
@@ -1083,12 +1533,13 @@ class FederationComposer:
         query: str,
         variables: Dict[str, Any],
         final_result: Dict[str, Any],
-        total_duration_ms: float
+        total_duration_ms: float,
+        timestamp_ns: int
     ):
         """
         Record complete execution trace to run-storage-service.
 
-        This is fire-and-forget - errors won't affect the response.
+        Runs on a background worker - errors won't affect the response.
 
         Args:
             run_id: Request tracking ID
@@ -1096,19 +1547,21 @@ class FederationComposer:
             variables: Query variables
             final_result: Final merged result
             total_duration_ms: Total execution time
+            timestamp_ns: When the query completed (time.time_ns())
         """
         try:
-            # Get tracked service calls for this run
-            service_calls = self.run_service_calls.get(run_id, [])
+            # Take tracked service calls for this run; they're released whatever the outcome
+            entry = self.run_service_calls.pop(run_id, None)
+            service_calls = entry[1] if entry else []
 
             # Build run data
             run_data = {
                 "run_id": run_id,
                 "query": query,
                 "variables": variables,
-                "timestamp": datetime.utcnow().isoformat() + "Z",
+                "timestamp": _iso_utc(timestamp_ns),
                 "duration_ms": round(total_duration_ms, 2),
-                "service_calls": service_calls,
+                "service_calls": [call.to_dict() for call in service_calls],
                 "final_result": final_result,
                 "has_errors": "errors" in final_result,
                 "error_summary": None,
@@ -1125,24 +1578,19 @@ class FederationComposer:
                 run_data["error_summary"] = "; ".join(error_msgs[:3])  # First 3 errors
 
             # Send to run-storage-service
-            async with httpx.AsyncClient(timeout=5.0) as client:
-                response = await client.post(
-                    f"{self.run_storage_url}/runs",
-                    json=run_data
-                )
-
-                if response.status_code == 200:
-                    logger.debug(f"[{run_id}] Recorded execution trace to run-storage-service")
-                else:
-                    logger.warning(f"[{run_id}] Failed to record trace: {response.status_code}")
+            client = self._get_client()
+            response = await client.post(
+                f"{self.run_storage_url}/runs",
+                content=orjson.dumps(run_data),
+                headers={'Content-Type': 'application/json'},
+                timeout=5.0
+            )
 
-            # Clean up tracked calls for this run to free memory
-            if run_id in self.run_service_calls:
-                del self.run_service_calls[run_id]
+            if response.status_code == 200:
+                logger.debug(f"[{run_id}] Recorded execution trace to run-storage-service")
+            else:
+                logger.warning(f"[{run_id}] Failed to record trace: {response.status_code}")
 
         except Exception as e:
             # Don't let recording errors affect the response
             logger.warning(f"[{run_id}] Error recording run: {e}")
-            # Clean up on error too
-            if run_id in self.run_service_calls:
-                del self.run_service_calls[run_id]
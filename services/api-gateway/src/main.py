@@ -3,30 +3,14 @@ API Gateway - GraphQL Federation and Service Discovery
 
 Routes requests to microservices and injects run_id for tracing.
 """
-import sys
 import os
-from pathlib import Path
-
-# Add shared SDK to path
-# In Docker: /app/shared/python (2 levels up from src/)
-# In dev: ../../../../shared/python (4 levels up from src/)
-docker_sdk_path = Path(__file__).parent.parent / "shared" / "python"
-dev_sdk_path = Path(__file__).parent.parent.parent.parent / "shared" / "python"
-
-if docker_sdk_path.exists():
-    shared_sdk_path = docker_sdk_path
-elif dev_sdk_path.exists():
-    shared_sdk_path = dev_sdk_path
-else:
-    raise ImportError(f"Could not find playground_sdk. Tried: {docker_sdk_path}, {dev_sdk_path}")
-
-sys.path.insert(0, str(shared_sdk_path))
 
+import orjson
 from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
-# Import from shared SDK
+# Import from shared SDK (installed from shared/python)
 from playground_sdk import RunContext, get_run_id, set_run_id, setup_logging, setup_tracing
 from playground_sdk.logging import get_logger
 
@@ -40,8 +24,6 @@ except ImportError:
     print("Warning: OpenTelemetry instrumentation not available")
 
 # Import service discovery
-# Add parent directory to path for src imports
-sys.path.insert(0, str(Path(__file__).parent.parent))
 from src.service_registry import ServiceRegistry
 from src.federation import FederationComposer
 
@@ -94,6 +76,7 @@ async def lifespan(app: FastAPI):
     yield
 
     logger.info("API Gateway shutting down...")
+    await app.state.federation.aclose()
 
 
 # Create FastAPI app
@@ -251,14 +234,15 @@ async def graphql_endpoint(request: Request):
     federation: FederationComposer = request.app.state.federation
     run_id = request.state.run_id
 
-    body = await request.json()
+    body = orjson.loads(await request.body())
     query = body.get('query', '')
     variables = body.get('variables', {})
 
     # Execute federated query
     result = await federation.execute_federated_query(query, variables, run_id)
 
-    return result
+    # Serialize directly rather than through FastAPI's jsonable_encoder + json.dumps
+    return Response(content=orjson.dumps(result), media_type="application/json")
 
 
 @app.post("/call/{service_name}")
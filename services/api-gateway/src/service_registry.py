@@ -7,6 +7,7 @@ Uses Cloud Run API to discover running services and their URLs.
 import os
 from typing import Dict, Optional
 import httpx
+import orjson
 from google.cloud import run_v2
 from google.api_core import exceptions
 
@@ -140,7 +141,7 @@ class ServiceRegistry:
             )
 
             response.raise_for_status()
-            result = response.json()
+            result = orjson.loads(response.content)
 
             # Check for GraphQL errors
             if 'errors' in result:
@@ -4,6 +4,7 @@ GCP Microservices Playground SDK
 This SDK provides common functionality for all microservices:
 - RunContext: Execution tracking with run_id
 - Service Router: Local/remote service discovery
+- DataLoader: Batching of service calls within a request
 - Tracing: OpenTelemetry integration
 - Logging: Structured logging
 - Decorators: Handler decorators for easy service creation
@@ -11,22 +12,26 @@ This SDK provides common functionality for all microservices:
 
 __version__ = "0.1.0"
 
-from .context import RunContext, get_run_id, set_run_id
+from .context import RunContext, get_run_id, set_run_id, parse_traceparent
 from .router import ServiceRouter, router
+from .loader import DataLoader
 from .decorators import handler, mutation, query
-from .tracing import setup_tracing, get_tracer
+from .tracing import setup_tracing, shutdown_tracing, get_tracer
 from .logging import setup_logging, get_logger
 
 __all__ = [
     'RunContext',
     'get_run_id',
     'set_run_id',
+    'parse_traceparent',
     'ServiceRouter',
     'router',
+    'DataLoader',
     'handler',
     'mutation',
     'query',
     'setup_tracing',
+    'shutdown_tracing',
     'get_tracer',
     'setup_logging',
     'get_logger',
@@ -1,13 +1,80 @@
 """RunContext for execution tracking with run_id"""
 
 from contextvars import ContextVar
-from typing import Optional, Dict, Any
-import secrets
-from datetime import datetime
+from typing import Optional, Dict, Any, Tuple
+import itertools
+import os
+import time
 
 # Thread-safe run context storage
 _run_context: ContextVar[Optional['RunContext']] = ContextVar('run_context', default=None)
 
+# run_id reported by get_run_id() when no run context is active
+NO_RUN_ID = '-'
+
+# run_ids are for tracing, not security: the suffix comes from a per-process
+# counter starting at a random offset, so there's no getrandom() syscall per id
+_run_counter = itertools.count(int.from_bytes(os.urandom(4), 'big'))
+
+
+def _reseed_run_counter():
+    """Give forked workers their own offset so they don't repeat the parent's ids"""
+    global _run_counter
+    _run_counter = itertools.count(int.from_bytes(os.urandom(4), 'big'))
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reseed_run_counter)
+
+# Length of a version 00 traceparent: 00-<32 hex trace-id>-<16 hex parent-id>-<2 hex flags>
+TRACEPARENT_LENGTH = 55
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[Tuple[str, str, bool]]:
+    """
+    Parse a W3C traceparent header.
+
+    Args:
+        value: traceparent header value, if any
+
+    Returns:
+        (trace_id, parent_span_id, sampled), or None if absent or malformed
+    """
+    # Fixed layout, so fields are sliced at known offsets rather than split
+    if not value or len(value) != TRACEPARENT_LENGTH or value[2] != '-' or value[35] != '-' or value[52] != '-':
+        return None
+    if value.startswith('ff'):
+        return None
+    trace_id, span_id, flags = value[3:35], value[36:52], value[53:]
+    try:
+        # All-zero ids are invalid per the spec
+        if not int(trace_id, 16) or not int(span_id, 16):
+            return None
+        sampled = bool(int(flags, 16) & 1)
+    except ValueError:
+        return None
+    return trace_id, span_id, sampled
+
+
+# Last run_id timestamp prefix: (epoch second, formatted)
+_last_timestamp = (-1, '')
+
+
+def _utc_timestamp() -> str:
+    """
+    Current UTC time as YYYYmmddHHMMSS, formatted at most once per second.
+
+    No lock needed: the cache is a single tuple swap, and a race at worst
+    formats the same second twice.
+    """
+    global _last_timestamp
+    now = int(time.time())
+    second, formatted = _last_timestamp
+    if now != second:
+        formatted = time.strftime('%Y%m%d%H%M%S', time.gmtime(now))
+        _last_timestamp = (now, formatted)
+    return formatted
+
 
 class RunContext:
     """
@@ -32,32 +99,77 @@ class RunContext:
         ```
     """
 
-    def __init__(self, run_id: Optional[str] = None, metadata: Optional[Dict[str, Any]] = None):
+    # One per request: no per-instance __dict__
+    __slots__ = (
+        'run_id', 'trace_id', 'parent_span_id', 'sampled', 'baggage',
+        '_metadata', '_loaders', '_token'
+    )
+
+    def __init__(
+        self,
+        run_id: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        trace_id: Optional[str] = None,
+        parent_span_id: Optional[str] = None,
+        sampled: Optional[bool] = None,
+        baggage: Optional[str] = None
+    ):
         """
         Initialize RunContext.
 
         Args:
             run_id: Optional run_id. If not provided, generates new one.
             metadata: Optional metadata dictionary to attach to this run.
+            trace_id: W3C trace-id from an incoming traceparent header.
+            parent_span_id: W3C parent-id from an incoming traceparent header.
+            sampled: Caller's sampling decision, None if it made none.
+            baggage: Incoming W3C baggage header value, passed on unchanged.
         """
         self.run_id = run_id or self._generate_run_id()
-        self.metadata = metadata or {}
+        self.trace_id = trace_id
+        self.parent_span_id = parent_span_id
+        self.sampled = sampled
+        self.baggage = baggage
+        # Most runs never get metadata, so the dict is created on first write
+        self._metadata = metadata or None
+        self._loaders = None
         self._token = None
 
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        """Metadata attached to this run"""
+        if self._metadata is None:
+            self._metadata = {}
+        return self._metadata
+
+    @metadata.setter
+    def metadata(self, value: Dict[str, Any]):
+        self._metadata = value
+
+    @property
+    def loaders(self) -> Dict[str, Any]:
+        """DataLoaders for this run by name, so resolvers in one request share batches"""
+        if self._loaders is None:
+            self._loaders = {}
+        return self._loaders
+
     @staticmethod
     def _generate_run_id() -> str:
         """
         Generate unique run_id.
 
-        Format: exec_{timestamp}_{random}
+        Format: exec_{timestamp}_{suffix}
         Example: exec_20250113103045_a7b3c9d2
 
+        The suffix is unique per process but not secret; pass an explicit
+        run_id (e.g. secrets.token_hex(4)) where unpredictability matters.
+
         Returns:
             Unique run_id string
         """
-        timestamp = datetime.utcnow().strftime('%Y%m%d%H%M%S')
-        random_hex = secrets.token_hex(4)
-        return f'exec_{timestamp}_{random_hex}'
+        timestamp = _utc_timestamp()
+        suffix = next(_run_counter) & 0xFFFFFFFF
+        return f'exec_{timestamp}_{suffix:08x}'
 
     @classmethod
     def get_current(cls) -> 'RunContext':
@@ -93,7 +205,9 @@ class RunContext:
             key: Metadata key
             value: Metadata value
         """
-        self.metadata[key] = value
+        if self._metadata is None:
+            self._metadata = {}
+        self._metadata[key] = value
 
     def get_metadata(self, key: str, default: Any = None) -> Any:
         """
@@ -106,7 +220,9 @@ class RunContext:
         Returns:
             Metadata value or default
         """
-        return self.metadata.get(key, default)
+        if self._metadata is None:
+            return default
+        return self._metadata.get(key, default)
 
     def __enter__(self):
         """Context manager entry - sets this as current context"""
@@ -126,12 +242,16 @@ class RunContext:
 
 def get_run_id() -> str:
     """
-    Get current run_id.
+    Get current run_id without creating a context.
+
+    Called for every log record and span, so it never generates an id;
+    use RunContext.get_current() to start a run when none is active.
 
     Returns:
-        Current run_id string
+        Current run_id string, or NO_RUN_ID ('-') when no run context is set
     """
-    return RunContext.get_current().run_id
+    ctx = _run_context.get()
+    return ctx.run_id if ctx is not None else NO_RUN_ID
 
 
 def set_run_id(run_id: str):
@@ -2,7 +2,7 @@
 
 from functools import wraps
 from typing import Callable, Any
-from .context import RunContext
+from .context import RunContext, _run_context
 
 
 def handler(func: Callable) -> Callable:
@@ -35,13 +35,14 @@ def handler(func: Callable) -> Callable:
         # Extract run_id from kwargs if provided
         run_id = kwargs.pop('run_id', None)
 
-        # Create or get run context
-        if run_id:
-            run_ctx = RunContext(run_id)
-        else:
-            run_ctx = RunContext.get_current()
+        # Already inside a run: reuse it without touching the context var
+        if not run_id:
+            current = _run_context.get()
+            if current is not None:
+                return await func(current, *args, **kwargs)
 
-        # Set context and call handler
+        # New run (or an explicit run_id): set context for the call
+        run_ctx = RunContext(run_id)
         with run_ctx:
             # Inject run context as first parameter
             return await func(run_ctx, *args, **kwargs)
@@ -49,42 +50,17 @@ def handler(func: Callable) -> Callable:
     return wrapper
 
 
-def mutation(func: Callable) -> Callable:
-    """
-    Decorator for GraphQL mutations - same as @handler.
-
-    This is an alias for @handler to make GraphQL code more readable.
-
-    Example:
-        ```python
-        from playground_sdk import mutation, RunContext
-
-        @mutation
-        async def create_order(run: RunContext, amount: float):
-            # Your mutation logic
-            return {"order_id": 123}
-        ```
-    """
-    return handler(func)
-
-
-def query(func: Callable) -> Callable:
-    """
-    Decorator for GraphQL queries - same as @handler.
-
-    This is an alias for @handler to make GraphQL code more readable.
-
-    Example:
-        ```python
-        from playground_sdk import query, RunContext
-
-        @query
-        async def get_order(run: RunContext, order_id: int):
-            # Your query logic
-            return {"id": order_id, "status": "processing"}
-        ```
-    """
-    return handler(func)
+# Aliases for @handler that make GraphQL code more readable, e.g.
+#
+#     @mutation
+#     async def create_order(run: RunContext, amount: float):
+#         return {"order_id": 123}
+#
+#     @query
+#     async def get_order(run: RunContext, order_id: int):
+#         return {"id": order_id, "status": "processing"}
+mutation = handler
+query = handler
 
 
 def trace_operation(operation_name: str):
@@ -0,0 +1,115 @@
+"""DataLoader for batching service calls made while resolving one request"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+
+
+class DataLoader:
+    """
+    Coalesces load(key) calls from one event-loop tick into a single batch call.
+
+    Resolvers that each need one record from the same service await
+    load(key); the loader collects every key requested before the loop
+    next runs and makes one call for all of them, so N resolvers cost one
+    round trip instead of N. Keys repeated within a batch are sent once.
+
+    Loaders are meant to live for a single request, e.g. in RunContext.loaders.
+
+    Example:
+        ```python
+        from playground_sdk import DataLoader, handler, RunContext
+
+        @handler
+        async def get_user(run: RunContext, id: int):
+            users = run.loaders.get('db-service')
+            if users is None:
+                users = run.loaders['db-service'] = DataLoader.for_service(
+                    'db-service',
+                    'query($ids: [ID!]!) { batch(ids: $ids) { id name } }',
+                    field='batch'
+                )
+            return await users.load(id)
+        ```
+    """
+
+    __slots__ = ('_batch_fn', '_pending', '_tasks')
+
+    def __init__(self, batch_fn: Callable[[List[Hashable]], Awaitable[List[Any]]]):
+        """
+        Initialize DataLoader.
+
+        Args:
+            batch_fn: Async function taking a list of keys and returning
+                one value per key, in the same order.
+        """
+        self._batch_fn = batch_fn
+        self._pending: Optional[Dict[Hashable, asyncio.Future]] = None
+        # The loop only holds weak references to tasks; keep in-flight batches alive
+        self._tasks = set()
+
+    @classmethod
+    def for_service(cls, service_name: str, query: str, field: str, variable: str = 'ids') -> 'DataLoader':
+        """
+        DataLoader that batches keys into one router.call_service call.
+
+        Args:
+            service_name: Name of the service to call
+            query: GraphQL query taking the list of keys as $<variable>
+            field: Response field holding one result per key, in key order
+            variable: Name of the query variable receiving the keys
+
+        Returns:
+            DataLoader for the service
+        """
+        async def batch(keys: List[Hashable]) -> List[Any]:
+            from .router import router
+            data = await router.call_service(service_name, query, {variable: keys})
+            return data[field]
+
+        return cls(batch)
+
+    def load(self, key: Hashable) -> asyncio.Future:
+        """
+        Request one key; resolves once its batch has been fetched.
+
+        Args:
+            key: Key to load
+
+        Returns:
+            Future for the value returned for this key
+        """
+        if self._pending is None:
+            self._pending = {}
+            asyncio.get_running_loop().call_soon(self._dispatch)
+
+        future = self._pending.get(key)
+        if future is None:
+            future = self._pending[key] = asyncio.get_running_loop().create_future()
+        return future
+
+    def load_many(self, keys: List[Hashable]) -> asyncio.Future:
+        """Request several keys; they join the current tick's batch"""
+        return asyncio.gather(*[self.load(key) for key in keys])
+
+    def _dispatch(self):
+        """Send everything queued this tick as one batch"""
+        pending, self._pending = self._pending, None
+        task = asyncio.ensure_future(self._run_batch(pending))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, pending: Dict[Hashable, asyncio.Future]):
+        keys = list(pending)
+        try:
+            values = await self._batch_fn(keys)
+            if len(values) != len(keys):
+                raise ValueError(f"Batch function returned {len(values)} values for {len(keys)} keys")
+        except Exception as e:
+            for future in pending.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for future, value in zip(pending.values(), values):
+            if not future.done():
+                future.set_result(value)
@@ -3,22 +3,56 @@
 import logging
 import json
 import sys
-from typing import Optional, Dict, Any
-from datetime import datetime
+import time
+from typing import Optional, Dict, Any, Union
 from .context import get_run_id
 
+try:
+    import orjson
+except ImportError:  # Optional speedup, fall back to stdlib json
+    orjson = None
+
+# Level names accepted by log_with_context
+_LEVELS = {
+    'debug': logging.DEBUG,
+    'info': logging.INFO,
+    'warning': logging.WARNING,
+    'error': logging.ERROR,
+    'critical': logging.CRITICAL,
+}
+
+# Last formatted log second: (epoch second, 'YYYY-mm-ddTHH:MM:SS')
+_last_second = (-1, '')
+
+
+def _iso_timestamp(created: float) -> str:
+    """ISO 8601 UTC timestamp with microseconds; the seconds part is formatted once per second"""
+    global _last_second
+    second = int(created)
+    cached_second, prefix = _last_second
+    if second != cached_second:
+        prefix = time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(second))
+        _last_second = (second, prefix)
+    return f'{prefix}.{int((created - second) * 1_000_000):06d}Z'
+
 
 class StructuredFormatter(logging.Formatter):
     """
     JSON formatter for structured logging.
 
     Outputs logs as JSON with run_id and other structured fields.
+    Source location is attached only to records at `source_level` or above
+    (WARNING by default); pass logging.NOTSET to include it everywhere.
     """
 
+    def __init__(self, *args, source_level: int = logging.WARNING, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.source_level = source_level
+
     def format(self, record: logging.LogRecord) -> str:
         """Format log record as JSON"""
         log_data = {
-            'timestamp': datetime.utcnow().isoformat() + 'Z',
+            'timestamp': _iso_timestamp(record.created),
             'severity': record.levelname,
             'message': record.getMessage(),
             'logger': record.name,
@@ -26,20 +60,25 @@ class StructuredFormatter(logging.Formatter):
         }
 
         # Add extra fields if present
-        if hasattr(record, 'extra'):
-            log_data.update(record.extra)
+        extra = getattr(record, 'extra', None)
+        if extra:
+            log_data.update(extra)
 
         # Add exception info if present
         if record.exc_info:
             log_data['exception'] = self.formatException(record.exc_info)
 
-        # Add source location
-        log_data['source'] = {
-            'file': record.pathname,
-            'line': record.lineno,
-            'function': record.funcName
-        }
-
+        # Add source location where it's worth the bytes
+        if record.levelno >= self.source_level:
+            log_data['source'] = {
+                'file': record.pathname,
+                'line': record.lineno,
+                'function': record.funcName
+            }
+
+        if orjson is not None:
+            # NON_STR_KEYS: extras may use int keys, which json.dumps stringifies too
+            return orjson.dumps(log_data, option=orjson.OPT_NON_STR_KEYS).decode()
         return json.dumps(log_data)
 
 
@@ -128,15 +167,17 @@ class LoggerAdapter(logging.LoggerAdapter):
 
     def process(self, msg: str, kwargs: Dict[str, Any]) -> tuple:
         """Add run_id to log extra data"""
-        extra = kwargs.get('extra', {})
-        extra['run_id'] = get_run_id()
-        kwargs['extra'] = extra
+        extra = kwargs.get('extra')
+        if extra is None:
+            kwargs['extra'] = {'run_id': get_run_id()}
+        else:
+            extra['run_id'] = get_run_id()
         return msg, kwargs
 
 
 def log_with_context(
     logger: logging.Logger,
-    level: str,
+    level: Union[str, int],
     message: str,
     **kwargs
 ):
@@ -145,7 +186,7 @@ def log_with_context(
 
     Args:
         logger: Logger instance
-        level: Log level (debug, info, warning, error, critical)
+        level: Log level name (debug, info, warning, error, critical) or number
         message: Log message
         **kwargs: Additional fields to include in log
 
@@ -161,5 +202,6 @@ def log_with_context(
     extra = {'run_id': get_run_id()}
     extra.update(kwargs)
 
-    log_method = getattr(logger, level.lower())
-    log_method(message, extra=extra)
+    if not isinstance(level, int):
+        level = _LEVELS.get(level) or _LEVELS[level.lower()]
+    logger.log(level, message, extra=extra)
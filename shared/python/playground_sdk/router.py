@@ -1,9 +1,45 @@
 """Service Router for discovering and calling microservices"""
 
+import json
 import os
+import sys
 import httpx
 from typing import Dict, Optional, Any
-from .context import get_run_id
+from .context import RunContext
+
+try:
+    import orjson
+except ImportError:  # Optional speedup, fall back to stdlib json
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # Optional; peers are then always called with JSON
+    msgpack = None
+
+MSGPACK_CONTENT_TYPE = 'application/msgpack'
+
+# Response header a peer sets when its /graphql endpoint accepts msgpack bodies
+MSGPACK_CAPABILITY_HEADER = 'X-Accept-Msgpack'
+
+
+# Methods call_rest supports; only these send `data` as a JSON body
+_REST_METHODS = frozenset({'GET', 'POST', 'PUT', 'DELETE'})
+_BODY_METHODS = frozenset({'POST', 'PUT'})
+
+
+def _dumps_json(obj) -> bytes:
+    """Serialize a request body to JSON bytes (orjson when installed)"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode()
+
+
+def _loads_json(data: bytes):
+    """Parse a JSON response body (orjson when installed)"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
 
 
 class ServiceRouter:
@@ -31,34 +67,54 @@ class ServiceRouter:
     def __init__(self):
         self.local_service = os.getenv('LOCAL_SERVICE')
         self._service_urls: Dict[str, str] = {}
+        # Same services, with the /graphql endpoint already appended
+        self._graphql_urls: Dict[str, str] = {}
         self._load_service_urls()
+        # Headers every call sends; run and trace headers are added per call
+        self._base_headers = {
+            'Content-Type': 'application/json',
+            'User-Agent': 'playground-sdk/0.1.0'
+        }
+        # Shared HTTP client for every call, created on first use
+        self._client: Optional[httpx.AsyncClient] = None
+        # Services that advertised msgpack support in an earlier response
+        self._msgpack_services: set = set()
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """
+        Return the shared HTTP client.
+
+        One pooled client keeps connections (and TLS sessions) alive across
+        calls instead of reconnecting for every request.
+        """
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                http2=True,
+                timeout=httpx.Timeout(30.0),
+                limits=httpx.Limits(max_keepalive_connections=32, max_connections=128)
+            )
+        return self._client
+
+    async def aclose(self):
+        """Close the shared HTTP client (call on shutdown)"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
 
     def _load_service_urls(self):
-        """Load service URLs from environment variables"""
-        # Common services that might exist
-        potential_services = [
-            'api-gateway',
-            'db-service',
-            'storage-service',
-            'ui-automation-service',
-            'query-service',
-            'payment-service',
-            'order-service',
-            'email-service',
-            'auth-service',
-        ]
-
-        for service in potential_services:
-            env_var = service.upper().replace('-', '_') + '_URL'
-
-            # Check if this service is running locally
-            if service == self.local_service:
-                self._service_urls[service] = os.getenv(env_var, 'http://localhost:8080')
-            else:
-                # Use remote URL from environment if available
-                url = os.getenv(env_var)
-                if url:
-                    self._service_urls[service] = url
+        """
+        Load service URLs from environment variables, in one pass over os.environ.
+
+        PAYMENT_SERVICE_URL registers payment-service, and API_GATEWAY_URL the
+        gateway. Other *_URL settings (e.g. RUN_STORAGE_URL) aren't services.
+        """
+        for env_var, url in os.environ.items():
+            if url and (env_var.endswith('_SERVICE_URL') or env_var == 'API_GATEWAY_URL'):
+                self.register_service(env_var[:-4].lower().replace('_', '-'), url)
+
+        # A service running locally defaults to the local port
+        if self.local_service and self.local_service not in self._service_urls:
+            self.register_service(self.local_service, 'http://localhost:8080')
 
     def register_service(self, name: str, url: str):
         """
@@ -68,7 +124,9 @@ class ServiceRouter:
             name: Service name (e.g., 'payment-service')
             url: Service URL (e.g., 'https://payment-service-xxx.run.app')
         """
+        name = sys.intern(name)
         self._service_urls[name] = url
+        self._graphql_urls[name] = url if url.endswith('/graphql') else f'{url}/graphql'
 
     def get_url(self, service_name: str) -> Optional[str]:
         """
@@ -105,33 +163,43 @@ class ServiceRouter:
             ValueError: If service not found
             httpx.HTTPError: If request fails
         """
-        url = self.get_url(service_name)
+        url = self._graphql_urls.get(service_name)
 
         if not url:
             raise ValueError(f"Service {service_name} not found. Available: {list(self._service_urls.keys())}")
 
-        # Ensure URL has /graphql endpoint
-        if not url.endswith('/graphql'):
-            url = f'{url}/graphql'
-
-        async with httpx.AsyncClient(timeout=timeout) as client:
-            response = await client.post(
-                url,
-                json={
-                    'query': query,
-                    'variables': variables or {}
-                },
-                headers=self._get_headers()
-            )
-
-            response.raise_for_status()
-            result = response.json()
-
-            # Check for GraphQL errors
-            if 'errors' in result:
-                raise Exception(f"GraphQL errors: {result['errors']}")
-
-            return result.get('data', {})
+        payload = {
+            'query': query,
+            'variables': variables or {}
+        }
+        headers = self._get_headers()
+        if service_name in self._msgpack_services:
+            content = msgpack.packb(payload)
+            headers['Content-Type'] = MSGPACK_CONTENT_TYPE
+        else:
+            content = _dumps_json(payload)
+
+        response = await self._get_client().post(
+            url,
+            content=content,
+            headers=headers,
+            timeout=timeout
+        )
+
+        response.raise_for_status()
+        if response.headers.get('content-type', '').startswith(MSGPACK_CONTENT_TYPE):
+            result = msgpack.unpackb(response.content, raw=False)
+        else:
+            result = _loads_json(response.content)
+            # Switch to msgpack for later calls once the peer says it accepts it
+            if msgpack is not None and response.headers.get(MSGPACK_CAPABILITY_HEADER) == '1':
+                self._msgpack_services.add(service_name)
+
+        # Check for GraphQL errors
+        if 'errors' in result:
+            raise Exception(f"GraphQL errors: {result['errors']}")
+
+        return result.get('data', {})
 
     async def call_rest(
         self,
@@ -166,33 +234,39 @@ class ServiceRouter:
         # Construct full URL
         full_url = f'{url.rstrip("/")}/{path.lstrip("/")}'
 
-        async with httpx.AsyncClient(timeout=timeout) as client:
-            if method.upper() == 'GET':
-                response = await client.get(full_url, headers=self._get_headers())
-            elif method.upper() == 'POST':
-                response = await client.post(full_url, json=data, headers=self._get_headers())
-            elif method.upper() == 'PUT':
-                response = await client.put(full_url, json=data, headers=self._get_headers())
-            elif method.upper() == 'DELETE':
-                response = await client.delete(full_url, headers=self._get_headers())
-            else:
-                raise ValueError(f"Unsupported HTTP method: {method}")
-
-            response.raise_for_status()
-            return response.json()
+        method = method.upper()
+        if method not in _REST_METHODS:
+            raise ValueError(f"Unsupported HTTP method: {method}")
+
+        response = await self._get_client().request(
+            method,
+            full_url,
+            json=data if method in _BODY_METHODS else None,
+            headers=self._get_headers(),
+            timeout=timeout
+        )
+
+        response.raise_for_status()
+        return _loads_json(response.content)
 
     def _get_headers(self) -> Dict[str, str]:
         """
-        Get headers for requests with run_id.
+        Get headers for requests with run_id and trace context.
 
         Returns:
             Headers dictionary
         """
-        return {
-            'X-Run-ID': get_run_id(),
-            'Content-Type': 'application/json',
-            'User-Agent': 'playground-sdk/0.1.0'
-        }
+        # An outgoing call starts a run if none is active, so downstream shares its id
+        ctx = RunContext.get_current()
+        headers = {**self._base_headers, 'X-Run-ID': ctx.run_id}
+
+        # Pass the trace and its sampling decision on, so downstream samples alike
+        if ctx.trace_id and ctx.parent_span_id:
+            headers['traceparent'] = f"00-{ctx.trace_id}-{ctx.parent_span_id}-{'01' if ctx.sampled else '00'}"
+        if ctx.baggage:
+            headers['baggage'] = ctx.baggage
+
+        return headers
 
     def list_services(self) -> Dict[str, str]:
         """
@@ -204,5 +278,5 @@ class ServiceRouter:
         return self._service_urls.copy()
 
 
-# Global router instance
+# Global router instance. Cheap to build: the HTTP client is created on first call
 router = ServiceRouter()
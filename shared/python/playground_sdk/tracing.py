@@ -8,6 +8,12 @@ from opentelemetry.sdk.trace.export import BatchSpanProcessor
 from opentelemetry.sdk.resources import Resource, SERVICE_NAME, SERVICE_VERSION
 from .context import get_run_id
 
+# Spans are queued and exported in the background: up to 512 per export,
+# at least every 5s, dropping (not blocking) once 8192 are waiting
+SPAN_QUEUE_SIZE = 8192
+SPAN_EXPORT_BATCH_SIZE = 512
+SPAN_EXPORT_DELAY_MILLIS = 5000
+
 
 def setup_tracing(
     service_name: str,
@@ -59,7 +65,12 @@ def setup_tracing(
 
             # Add batch processor
             provider.add_span_processor(
-                BatchSpanProcessor(cloud_trace_exporter)
+                BatchSpanProcessor(
+                    cloud_trace_exporter,
+                    max_queue_size=SPAN_QUEUE_SIZE,
+                    max_export_batch_size=SPAN_EXPORT_BATCH_SIZE,
+                    schedule_delay_millis=SPAN_EXPORT_DELAY_MILLIS
+                )
             )
         except ImportError:
             # Cloud Trace exporter not installed, skip
@@ -72,6 +83,18 @@ def setup_tracing(
     return trace.get_tracer(service_name, service_version)
 
 
+def shutdown_tracing():
+    """
+    Export any queued spans and stop the exporter.
+
+    Call once at service shutdown; spans still waiting in the batch queue
+    are lost otherwise.
+    """
+    provider = trace.get_tracer_provider()
+    if isinstance(provider, TracerProvider):
+        provider.shutdown()
+
+
 def get_tracer(service_name: Optional[str] = None) -> trace.Tracer:
     """
     Get tracer instance.
@@ -18,12 +18,15 @@ setup(
     url='https://github.com/yourusername/gcp-graphql',
     packages=find_packages(),
     install_requires=[
-        'httpx>=0.25.0',
+        'httpx[http2]>=0.25.0',
         'opentelemetry-api>=1.21.0',
         'opentelemetry-sdk>=1.21.0',
         'opentelemetry-exporter-cloud-trace>=1.6.0',
         'python-dotenv>=1.0.0',
     ],
+    extras_require={
+        'fast': ['orjson>=3.9.0', 'msgpack>=1.0.0'],
+    },
     python_requires='>=3.11',
     classifiers=[
         'Development Status :: 3 - Alpha',
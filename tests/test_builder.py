@@ -0,0 +1,64 @@
+"""Tests for deploy.builder"""
+
+import shutil
+import subprocess
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+
+try:
+    from deploy import builder
+except ImportError:  # Google Cloud client libraries not installed
+    builder = None
+
+
+class _FailingWriter:
+    """Upload stand-in that fails on the first chunk, like a rejected upload"""
+
+    bytes_written = 0
+
+    def write(self, data):
+        raise RuntimeError('upload failed')
+
+
+@unittest.skipIf(builder is None, 'deploy dependencies not installed')
+class WriteArchivePigzTest(unittest.TestCase):
+
+    def setUp(self):
+        tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, tmp)
+        self.source = tmp / 'services' / 'example'
+        self.source.mkdir(parents=True)
+        # Far larger than a pipe buffer, so a stalled reader would block the tar writer
+        (self.source / 'payload.bin').write_bytes(b'x' * (16 * 1024 * 1024))
+
+    def test_upload_error_is_raised_instead_of_hanging(self):
+        real_popen = subprocess.Popen
+
+        def popen(args, **kwargs):
+            # `cat` stands in for pigz: same pipes, no compression needed
+            return real_popen(['cat'], **kwargs)
+
+        cloud_builder = builder.CloudBuilder.__new__(builder.CloudBuilder)
+        outcome = {}
+
+        def run():
+            try:
+                cloud_builder._write_archive_pigz(self.source, _FailingWriter())
+            except BaseException as e:
+                outcome['error'] = e
+
+        with mock.patch.object(builder.subprocess, 'Popen', popen):
+            thread = threading.Thread(target=run, daemon=True)
+            thread.start()
+            thread.join(timeout=30)
+
+        self.assertFalse(thread.is_alive(), '_write_archive_pigz hung after the upload failed')
+        self.assertIsInstance(outcome.get('error'), RuntimeError)
+        self.assertEqual(str(outcome['error']), 'upload failed')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,28 +5,63 @@ Usage:
     python tools/create_service.py my-service --lang python --description "My cool service"
 """
 
+import os
+import re
 import typer
 import shutil
 from pathlib import Path
 from rich.console import Console
-from typing import Optional
+from typing import Iterator, Optional
 
 app = typer.Typer(help="Create new microservices from templates")
 console = Console()
 
+# Template files that may contain {{PLACEHOLDER}}s (a tuple for str.endswith)
+TEMPLATE_SUFFIXES = ('.py', '.js', '.go', '.md', '.json', '.yaml', '.yml', '.txt', '.sh')
 
-def replace_placeholders(file_path: Path, replacements: dict):
-    """Replace placeholders in a file"""
-    if file_path.suffix in ['.py', '.js', '.go', '.md', '.json', '.yaml', '.yml', '.txt', '.sh']:
-        try:
-            content = file_path.read_text(encoding='utf-8')
 
-            for placeholder, value in replacements.items():
-                content = content.replace(f'{{{{{placeholder}}}}}', value)
+def placeholder_pattern(replacements: dict) -> re.Pattern:
+    """Bytes regex matching any {{PLACEHOLDER}} in replacements, capturing its name"""
+    names = b'|'.join(re.escape(name.encode()) for name in replacements)
+    return re.compile(rb'\{\{(' + names + rb')\}\}')
 
-            file_path.write_text(content, encoding='utf-8')
-        except Exception as e:
-            console.print(f'[yellow]Warning: Could not process {file_path}: {e}[/yellow]')
+
+def iter_files(directory) -> Iterator[str]:
+    """Yield the path of every file under directory, using os.scandir's cached entry types"""
+    pending = [os.fspath(directory)]
+    while pending:
+        with os.scandir(pending.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+                elif entry.is_file():
+                    yield entry.path
+
+
+def replace_placeholders(file_path, replacements: dict, pattern: Optional[re.Pattern] = None):
+    """
+    Replace placeholders in a file, in one pass; the file is only rewritten if something changed.
+
+    Works on raw bytes (placeholders are ASCII), so there's no decode/encode
+    round trip and line endings are left exactly as they were.
+    """
+    if not os.fspath(file_path).endswith(TEMPLATE_SUFFIXES):
+        return
+    if pattern is None:
+        pattern = placeholder_pattern(replacements)
+    values = {name.encode(): value.encode('utf-8') for name, value in replacements.items()}
+
+    try:
+        with open(file_path, 'rb') as f:
+            content = f.read()
+
+        new_content = pattern.sub(lambda m: values[m.group(1)], content)
+
+        if new_content != content:
+            with open(file_path, 'wb') as f:
+                f.write(new_content)
+    except Exception as e:
+        console.print(f'[yellow]Warning: Could not process {file_path}: {e}[/yellow]')
 
 
 def create_service(
@@ -66,9 +101,9 @@ def create_service(
     }
 
     # Replace placeholders in all files
-    for file_path in service_dir.rglob('*'):
-        if file_path.is_file():
-            replace_placeholders(file_path, replacements)
+    pattern = placeholder_pattern(replacements)
+    for file_path in iter_files(service_dir):
+        replace_placeholders(file_path, replacements, pattern)
 
     console.print(f'[green]✓ Created {service_name}[/green]')
     console.print(f'[dim]  Location: {service_dir}[/dim]')
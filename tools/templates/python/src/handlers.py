@@ -21,7 +21,20 @@ async def example_query(run: RunContext, id: int):
     Returns:
         Query result
     """
-    logger.info(f"Example query called with id={id}, run_id={run.run_id}")
+    logger.info("Example query called with id=%s, run_id=%s", id, run.run_id)
+
+    # Example: Load a record from another service. Every resolver in this
+    # request that loads from db-service shares one batched call.
+    # from playground_sdk import DataLoader
+    #
+    # loader = run.loaders.get('db-service')
+    # if loader is None:
+    #     loader = run.loaders['db-service'] = DataLoader.for_service(
+    #         'db-service',
+    #         'query($ids: [ID!]!) { batch(ids: $ids) { id } }',
+    #         field='batch'
+    #     )
+    # record = await loader.load(id)
 
     # Your query logic here
     result = {
@@ -45,7 +58,7 @@ async def example_mutation(run: RunContext, data: dict):
     Returns:
         Mutation result
     """
-    logger.info(f"Example mutation called, run_id={run.run_id}")
+    logger.info("Example mutation called, run_id=%s", run.run_id)
 
     # Example: Call another service
     # db_result = await router.call_service('db-service', '''
@@ -4,36 +4,64 @@
 This is a template for creating Python microservices using the playground SDK.
 """
 
+import asyncio
+import functools
 import os
 import sys
-from pathlib import Path
-from fastapi import FastAPI
+import msgpack
+import orjson
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from contextlib import asynccontextmanager
+from graphql import FieldNode, GraphQLError, OperationDefinitionNode, OperationType, parse
+from graphql.utilities import value_from_ast_untyped
+from opentelemetry import trace
+from opentelemetry.context import Context
+from opentelemetry.trace import NonRecordingSpan, SpanContext, TraceFlags
 
 # Add playground SDK to path
-sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent.parent / 'shared' / 'python'))
+_SDK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..', '..', 'shared', 'python')
+if _SDK_PATH not in sys.path:
+    sys.path.insert(0, _SDK_PATH)
 
 from playground_sdk import (
     RunContext,
+    parse_traceparent,
     setup_logging,
     setup_tracing,
+    shutdown_tracing,
     router
 )
+from playground_sdk.router import MSGPACK_CAPABILITY_HEADER, MSGPACK_CONTENT_TYPE
 
 # Import handlers
 from handlers import resolvers
 
-# Setup logging and tracing
+# Setup logging; tracing is set up at startup so import (and the first
+# health check) doesn't wait on exporter setup. Until then this tracer
+# defers to the global provider that setup_tracing installs.
 logger = setup_logging('{{SERVICE_NAME}}', level=os.getenv('LOG_LEVEL', 'INFO'))
-tracer = setup_tracing('{{SERVICE_NAME}}')
+tracer = trace.get_tracer('{{SERVICE_NAME}}')
+
+# Fraction of new traces that record spans; callers' decisions are honored.
+# Unsampled requests still carry a trace id downstream, they just record nothing.
+SAMPLE_RATE = float(os.getenv('TRACE_SAMPLE_RATE', '0.1'))
+_SAMPLE_THRESHOLD = int(SAMPLE_RATE * 0xFFFFFFFF)
+
+# Sent on every GraphQL response so SDK peers know they can switch to msgpack
+_CAPABILITY_HEADERS = {MSGPACK_CAPABILITY_HEADER: '1'}
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Startup and shutdown events"""
     logger.info("{{SERVICE_NAME}} starting up...")
+    setup_tracing('{{SERVICE_NAME}}')
     yield
     logger.info("{{SERVICE_NAME}} shutting down...")
+    await router.aclose()
+    # Flush spans still queued for export
+    shutdown_tracing()
 
 
 # Create FastAPI app
@@ -41,64 +69,230 @@ app = FastAPI(
     title="{{SERVICE_NAME}}",
     description="{{SERVICE_DESCRIPTION}}",
     version="0.1.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 
+# Constant bodies, encoded once; health is hit by every probe
+_ROOT_BYTES = orjson.dumps({
+    "service": "{{SERVICE_NAME}}",
+    "version": "0.1.0",
+    "status": "running"
+})
+_HEALTH_BYTES = b'{"status":"healthy"}'
+
+
 @app.get("/")
 async def root():
     """Root endpoint"""
-    return {
-        "service": "{{SERVICE_NAME}}",
-        "version": "0.1.0",
-        "status": "running"
-    }
+    return Response(content=_ROOT_BYTES, media_type="application/json")
 
 
 @app.get("/health")
 async def health():
     """Health check endpoint"""
-    return {"status": "healthy"}
+    return Response(content=_HEALTH_BYTES, media_type="application/json")
+
+
+# Root resolvers by operation type, looked up once per operation.
+# Kept per type rather than flattened, since a query and a mutation may share a field name.
+_ROOT_RESOLVERS = {
+    OperationType.QUERY: resolvers.get('Query', {}),
+    OperationType.MUTATION: resolvers.get('Mutation', {}),
+}
+
+
+@functools.lru_cache(maxsize=512)
+def _parse(query: str):
+    """Parse a query once; clients resend the same query text with new variables"""
+    return parse(query)
+
+
+async def _resolve_one(item: dict) -> dict:
+    """
+    Execute one GraphQL operation against `resolvers`.
+
+    Each top-level field calls the handler registered under its name with the
+    field's arguments; the handler's return value is the field's result.
+    """
+    if not isinstance(item, dict):
+        return {"errors": [{"message": "Each operation must be a JSON object"}]}
+
+    try:
+        document = _parse(item.get('query') or '')
+    except GraphQLError as e:
+        return {"errors": [{"message": e.message}]}
+
+    operation_name = item.get('operationName')
+    operation = next((
+        d for d in document.definitions
+        if isinstance(d, OperationDefinitionNode)
+        and (operation_name is None or (d.name and d.name.value == operation_name))
+    ), None)
+    if operation is None:
+        return {"errors": [{"message": f"Unknown operation: {operation_name or '(none)'}"}]}
+
+    root = _ROOT_RESOLVERS.get(operation.operation, {})
+    variables = item.get('variables') or {}
+
+    data, errors = {}, []
+    # Root fields run in order, as GraphQL requires for mutations
+    for selection in operation.selection_set.selections:
+        if not isinstance(selection, FieldNode):
+            continue
+        name = selection.name.value
+        key = selection.alias.value if selection.alias else name
+
+        resolver = root.get(name)
+        if resolver is None:
+            data[key] = None
+            errors.append({"message": f"Cannot query field '{name}'", "path": [key]})
+            continue
+
+        args = {arg.name.value: value_from_ast_untyped(arg.value, variables) for arg in selection.arguments}
+        try:
+            data[key] = await resolver(**args)
+        except Exception as e:
+            logger.exception("Resolver %s failed", name)
+            data[key] = None
+            errors.append({"message": str(e), "path": [key]})
+
+    result = {"data": data}
+    if errors:
+        result["errors"] = errors
+    return result
 
 
 @app.post("/graphql")
-async def graphql_endpoint(request):
-    """GraphQL endpoint - routes to handlers"""
-    from playground_sdk import RunContext
-
-    # Get run_id from header or create new
-    run_id = request.headers.get('X-Run-ID')
-    if run_id:
-        run_ctx = RunContext(run_id=run_id)
+async def graphql_endpoint(request: Request):
+    """
+    GraphQL endpoint - routes to handlers.
+
+    Accepts a single operation, or a JSON list of operations (Apollo-style
+    batching) that run concurrently and are answered as a list in order.
+    """
+    headers = request.headers
+
+    # Peers using the SDK router send msgpack once they've seen our capability header
+    use_msgpack = headers.get('content-type', '').startswith(MSGPACK_CONTENT_TYPE)
+
+    # Continue the caller's run, or start one when the header is absent.
+    # Not cached by run_id: metadata and loaders must not leak between requests.
+    run_ctx = RunContext(run_id=headers.get('x-run-id'), baggage=headers.get('baggage'))
+
+    # Join the caller's W3C trace, so proxies and tracers upstream share its ids
+    traceparent = parse_traceparent(headers.get('traceparent'))
+    if traceparent:
+        run_ctx.trace_id, run_ctx.parent_span_id, run_ctx.sampled = traceparent
     else:
-        run_ctx = RunContext()
+        # New trace: sample on a fresh trace id's low bits. These ids only
+        # travel with unsampled requests; a sampled one takes its root span's.
+        run_ctx.trace_id = os.urandom(16).hex()
+        run_ctx.parent_span_id = os.urandom(8).hex()
+        run_ctx.sampled = int(run_ctx.trace_id[-8:], 16) < _SAMPLE_THRESHOLD
 
     RunContext.set_current(run_ctx)
 
-    body = await request.json()
-    query = body.get('query', '')
-    variables = body.get('variables', {})
+    raw_body = await request.body()
+    body = msgpack.unpackb(raw_body, raw=False) if use_msgpack else orjson.loads(raw_body)
+
+    if not run_ctx.sampled:
+        return _encode(await _execute(body), use_msgpack)
+
+    if traceparent:
+        # Continue the caller's trace under its span
+        parent = trace.set_span_in_context(NonRecordingSpan(SpanContext(
+            trace_id=int(run_ctx.trace_id, 16),
+            span_id=int(run_ctx.parent_span_id, 16),
+            is_remote=True,
+            trace_flags=TraceFlags(TraceFlags.SAMPLED)
+        )))
+    else:
+        # Empty context: a real root span, with no parent that's never exported
+        parent = Context()
+
+    with tracer.start_as_current_span('graphql', context=parent) as span:
+        span.set_attribute('run_id', run_ctx.run_id)
+        # Downstream calls join this span's trace as its children
+        span_context = span.get_span_context()
+        run_ctx.trace_id = format(span_context.trace_id, '032x')
+        run_ctx.parent_span_id = format(span_context.span_id, '016x')
+        return _encode(await _execute(body), use_msgpack)
+
+
+async def _execute(body):
+    """Run a single operation or a batch, in the current run context"""
+    if isinstance(body, list):
+        # One round trip for many operations; each task inherits this run context
+        results = await asyncio.gather(*(_resolve_one(item) for item in body), return_exceptions=True)
+        return [
+            {"errors": [{"message": str(r)}]} if isinstance(r, Exception) else r
+            for r in results
+        ]
+
+    return await _resolve_one(body)
+
+
+# Root fields returning more items than this are streamed, this many at a time
+STREAM_BATCH_SIZE = 1000
+
+
+def _encode(result, use_msgpack: bool) -> Response:
+    """Encode a GraphQL result in the format the request came in"""
+    if use_msgpack:
+        return Response(content=msgpack.packb(result), media_type=MSGPACK_CONTENT_TYPE, headers=_CAPABILITY_HEADERS)
+    if isinstance(result, dict) and result.get("data") and any(
+        isinstance(value, list) and len(value) > STREAM_BATCH_SIZE
+        for value in result["data"].values()
+    ):
+        return StreamingResponse(_stream_json(result), media_type="application/json", headers=_CAPABILITY_HEADERS)
+    return ORJSONResponse(result, headers=_CAPABILITY_HEADERS)
 
-    # Simple query routing
-    # TODO: Implement proper GraphQL schema with Strawberry
 
-    return {
-        "data": {
-            "message": "GraphQL endpoint ready",
-            "run_id": run_ctx.run_id
-        }
-    }
+async def _stream_json(result: dict):
+    """
+    Encode a result as JSON in chunks, so long root lists never exist as one
+    encoded buffer alongside their Python objects.
+    """
+    yield b'{"data":{'
+    for i, (key, value) in enumerate(result["data"].items()):
+        if i:
+            yield b','
+        yield orjson.dumps(key) + b':'
+        if isinstance(value, list) and len(value) > STREAM_BATCH_SIZE:
+            yield b'['
+            for start in range(0, len(value), STREAM_BATCH_SIZE):
+                if start:
+                    yield b','
+                # Drop the batch's own brackets; items join the outer list
+                yield orjson.dumps(value[start:start + STREAM_BATCH_SIZE])[1:-1]
+            yield b']'
+        else:
+            yield orjson.dumps(value)
+    yield b'}'
+    if "errors" in result:
+        yield b',"errors":' + orjson.dumps(result["errors"])
+    yield b'}'
 
 
 if __name__ == "__main__":
     import uvicorn
 
     port = int(os.getenv('PORT', 8080))
+    reload = os.getenv('DEBUG', 'false').lower() == 'true'
 
     uvicorn.run(
         "main:app",
         host="0.0.0.0",
         port=port,
-        reload=os.getenv('DEBUG', 'false').lower() == 'true',
+        reload=reload,
+        # Reload runs a single process; otherwise use every core
+        workers=1 if reload else int(os.getenv('WEB_CONCURRENCY', os.cpu_count() or 1)),
+        # C event loop and HTTP parser, both included in uvicorn[standard]
+        loop="uvloop",
+        http="httptools",
+        # Longer than typical load balancer idle timeouts, so connections get reused
+        timeout_keep_alive=75,
         log_level=os.getenv('LOG_LEVEL', 'info').lower()
     )